@@ -2,10 +2,12 @@ import argparse
 import sys
 import traceback
 
-from PyQt6.QtWidgets import QApplication
-
 from .app import Controller
-from .gui import MainWindow
+from .engine import EngineProxy, create_engine
+from .loop import TickLoop
+from .protocol import PROTOCOL_VERSIONS
+from .schema import FrameSchema
+from .sharedstate import DEFAULT_NAME, SharedStateError
 
 
 def new_excepthook(type, value, tb):
@@ -16,15 +18,127 @@ def new_excepthook(type, value, tb):
 sys.excepthook = new_excepthook
 
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser()
+    parser.add_argument('--headless', action='store_true',
+                        help='run without the GUI (PyQt is not imported) and print periodic status lines')
+    parser.add_argument('--port', default='',
+                        help='port to connect to on startup: a serial device (COM3, /dev/ttyUSB0), '
+                             'udp://host:port or tcp://host:port')
+    parser.add_argument('--baudrate', type=int, default=Controller.DEFAULT_BAUDRATE)
+    parser.add_argument('--link', metavar='PORT', action='append', default=[],
+                        help='also send every frame to this port (repeatable), each link has its own writer thread')
+    parser.add_argument('--gamepads', type=int, default=1,
+                        help='gamepads packed one after the other into each frame, in the order they are plugged in')
+    parser.add_argument('--gamepad-port', metavar='PORT', action='append', default=[],
+                        help='one more gamepad, sent in frames of its own to this port (repeatable)')
+    parser.add_argument('--engine-process', action='store_true',
+                        help='poll the gamepad and send frames from a separate process, the window only views it')
+    parser.add_argument('--no-reconnect', action='store_true',
+                        help='do not reconnect automatically to the last port')
+    parser.add_argument('--status-interval', type=float, default=1.0,
+                        help='seconds between status lines in headless mode')
+    parser.add_argument('--rate', type=int, default=TickLoop.DEFAULT_RATE,
+                        help=f'frames sent per second ({TickLoop.MIN_RATE}-{TickLoop.MAX_RATE} Hz)')
+    parser.add_argument('--display-rate', type=float, default=50.0,
+                        help='window refreshes per second, independent of --rate')
+    parser.add_argument('--input-mode', choices=[m.name.lower() for m in Controller.InputMode], default='polling',
+                        help='sample the joystick every tick or apply joystick events only')
+    parser.add_argument('--send-policy', choices=[p.name.lower() for p in Controller.SendPolicy], default='always',
+                        help='send every tick or only on change plus a heartbeat')
+    parser.add_argument('--heartbeat', type=float, default=Controller.DEFAULT_HEARTBEAT_INTERVAL,
+                        help='seconds between heartbeat frames when the state is idle (on_change policy)')
+    parser.add_argument('--latency-stats', action='store_true',
+                        help='time each stage of the tick pipeline (shown in headless status lines)')
+    parser.add_argument('--protocol', type=int, choices=PROTOCOL_VERSIONS, default=PROTOCOL_VERSIONS[0],
+                        help='wire format: 1 = header + XOR checksum, 2 = SLIP framing, sequence number and CRC')
+    parser.add_argument('--schema', metavar='PATH', help='JSON frame schema, see app/schema.py')
+    parser.add_argument('--record', metavar='PATH', help='record every frame to a binary log')
+    parser.add_argument('--publish', metavar='NAME', nargs='?', const=DEFAULT_NAME,
+                        help=f'share every frame with local processes through shared memory (default {DEFAULT_NAME})')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='stream a recorded log to --port instead of reading the gamepad (no GUI)')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='replay speed relative to the recording, 0 sends as fast as possible')
+    parser.add_argument('--replay-loop', action='store_true', help='repeat the replay until interrupted')
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args, qt_args = parser.parse_known_args()
+    if qt_args and (args.headless or args.replay):
+        # Unknown options are only meant for Qt, without the GUI they are typos
+        parser.error(f'unrecognized arguments: {" ".join(qt_args)}')
+    if args.display_rate <= 0:
+        parser.error('--display-rate must be positive')
+    if args.gamepads < 1:
+        parser.error('--gamepads must be at least 1')
+
+    if args.replay:
+        if not args.port:
+            parser.error('--replay requires --port')
+        from .headless import replay_to_port
+        sys.exit(replay_to_port(args.replay, args.port, args.baudrate, args.replay_speed, args.replay_loop,
+                                args.protocol))
+
+    schema = None
+    if args.schema:
+        try:
+            schema = FrameSchema.load(args.schema, Controller.JOY_THRESHOLD)
+        except (OSError, ValueError) as e:
+            parser.error(f'--schema: {e}')
+
+    if args.engine_process:
+        if args.headless:
+            parser.error('--engine-process only applies to the GUI')
+        sys.exit(run_gui_with_engine(args, qt_args, schema))
+
+    try:
+        tuning_keypad, tick_loop = create_engine(args, schema)
+    except SharedStateError as e:
+        parser.error(f'--publish: {e}')
+    tick_loop.start()
+    tuning_keypad.telemetry.start()
+
+    if args.headless:
+        tuning_keypad.port_watcher.start()
+        from .headless import run_headless
+        sys.exit(run_headless(tuning_keypad, tick_loop, args.status_interval))
+
+    # Qt is only loaded when the GUI is requested
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from .gui import MainWindow
+
+    qapp = QApplication(sys.argv[:1] + qt_args)
+    gui = MainWindow(tuning_keypad, tick_loop, display_rate=args.display_rate)
+    gui.show()
+    # Scan ports once the window is up rather than before it appears
+    QTimer.singleShot(0, tuning_keypad.port_watcher.start)
+    exit_code = qapp.exec()
+    tick_loop.stop()
+    tuning_keypad.telemetry.stop()
+    tuning_keypad.stop_recording()
+    tuning_keypad.stop_publishing()
+    tuning_keypad.stop_links()
+    sys.exit(exit_code)
+
 
-    tuning_keypad = Controller()
+def run_gui_with_engine(args, qt_args, schema):
+    """GUI as a viewer of an engine process, see EngineProxy. :return: process exit code"""
+    from PyQt6.QtWidgets import QApplication
+    from .gui import MainWindow
 
-    qapp = QApplication(sys.argv)
-    gui = MainWindow(tuning_keypad)
+    engine = EngineProxy(args, schema)
+    engine.start()
+    qapp = QApplication(sys.argv[:1] + qt_args)
+    gui = MainWindow(engine, engine, display_rate=args.display_rate)
     gui.show()
-    sys.exit(qapp.exec())
+    try:
+        return qapp.exec()
+    finally:
+        engine.stop()
 
 
 if __name__ == '__main__':
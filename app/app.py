@@ -1,71 +1,187 @@
 import time
 import os
-from struct import pack
+import sys
+import threading
 from enum import Enum
 try:
     os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
-    import pygame
-    import serial
-    import serial.tools.list_ports
+    # pygame.pkgdata pulls in pkg_resources (100+ ms) only to locate its bundled font and icon, which we never
+    # use. Hide it during the import so pkgdata takes its plain-file fallback.
+    hide_pkg_resources = 'pkg_resources' not in sys.modules
+    if hide_pkg_resources:
+        sys.modules['pkg_resources'] = None
+    try:
+        import pygame
+    finally:
+        if hide_pkg_resources:
+            del sys.modules['pkg_resources']
 except ImportError:
     print("Package not found. Please install required packages by running \"pip install -r requirements.txt\"")
 
+from .gamepads import Gamepad, GamepadChannel
+from .history import FrameHistory
+from .hotplug import PortWatcher
+from .links import Link
+from .protocol import HEADER, XorProtocol, make_protocol
+from .recording import Recorder
+from .schema import DEFAULT_SCHEMA, FrameSchema
+from .stats import LatencyStats
+from .telemetry import TelemetryReader
+from .transport import TransportError, make_transport
+
 
 class Controller:
-    HEADER = 0x9C
+    HEADER = HEADER
     JOY_THRESHOLD = 0.08
     DEFAULT_BAUDRATE = 115200
     MAX_NUM_JOY_AXIS = 6    # 2 joysticks * 2 axis + 2 triggers
     MAX_NUM_BUTTONS = 16     # 8 buttons    
     CHECKSUM = 1        # 1 byte checksum
     # NUM_HAT = 1        # ignore hat for now
+    # Sizes of the default schema (DEFAULT_SCHEMA), a custom schema sets self.frame_size instead
     NUM_CONTROLLER_BYTES = MAX_NUM_JOY_AXIS + MAX_NUM_BUTTONS // 8 + CHECKSUM
+    FRAME_SIZE = 1 + NUM_CONTROLLER_BYTES   # header + controller state
+    DEFAULT_MIN_SEND_INTERVAL = 0.01    # s, rate limit for changed frames in SendPolicy.ON_CHANGE
+    DEFAULT_HEARTBEAT_INTERVAL = 0.1    # s, keeps the robot's failsafe fed while the state is idle
+    BITS_PER_BYTE = 10      # On a serial line (8N1): start bit, 8 data bits, stop bit
+    LINK_BUDGET = 0.9       # Share of a serial link's capacity frames may use, the rest absorbs clock drift
+    UTILIZATION_WINDOW = 1.0    # s
+    HISTORY_SECONDS = 10    # Of frames kept in Controller.history at up to HISTORY_MAX_RATE
+    HISTORY_MAX_RATE = 1000     # Frames/s, TickLoop.MAX_RATE
+    IDLE_DELAY = 2.0    # s without a gamepad or an output before the controller goes idle, see update_idle
 
     class Mode(Enum):
         AUTO_RECONNECT_MEMORY = 1
         DISABLED_AUTO_CONNECT = 2
 
-    def __init__(self, mode: Mode = Mode.AUTO_RECONNECT_MEMORY):
+    class SendPolicy(Enum):
+        ALWAYS = 1      # Send the frame every tick
+        ON_CHANGE = 2   # Send when the frame changed, otherwise only a periodic heartbeat
+
+    class InputMode(Enum):
+        POLLING = 1     # Sample every axis and button each tick
+        EVENT = 2       # Only apply JOYAXISMOTION/JOYBUTTON*/JOYHATMOTION events
+
+    def __init__(self, mode: Mode = Mode.AUTO_RECONNECT_MEMORY, input_mode: InputMode = InputMode.POLLING,
+                 schema: FrameSchema = None, num_gamepads=1):
+        """:param num_gamepads: gamepads packed one after the other into the frame payload"""
         self.pressed_keys = set()
-        self.ser = None
-        self.joysticks = None
-        self.num_buttons = 0
-        self.num_axis = 0
+        self.transport = None   # SerialTransport, UdpTransport or TcpTransport, see app/transport.py
         self.port = ''
         self.baudrate = Controller.DEFAULT_BAUDRATE
         self.mode = mode
-        self.ports = serial.tools.list_ports.comports()
+        self.input_mode = input_mode
+        self.ports = []
 
-        self.controller_state_data = bytearray(Controller.NUM_CONTROLLER_BYTES) # For sending through serial
+        # Frame payload layout, see app/schema.py
+        if schema is None:
+            schema = FrameSchema.from_dict(DEFAULT_SCHEMA, Controller.JOY_THRESHOLD)
+        self.schema = schema
+        # Raw input state the frame is encoded from, one Gamepad per schema payload in the frame
+        self.gamepads = [Gamepad(schema, 1 + i * schema.size) for i in range(num_gamepads)]
+        self.gamepad_channels = []  # Gamepads with a frame and port of their own, see add_gamepad_channel
+        self.all_gamepads = list(self.gamepads)     # Plus those of the channels, in the order joysticks take them
+        self.gamepads_by_id = {}    # Joystick instance ID -> Gamepad it drives
+        self.spare_joysticks = []   # Plugged in while every Gamepad was taken
+        # State of the first gamepad
+        self.axes = self.gamepads[0].axes
+        self.buttons = self.gamepads[0].buttons
+        self.hats = self.gamepads[0].hats
 
-        pygame.init()
-        pygame.joystick.init()
+        # Preallocated wire frame, filled in place every tick and sent with a single write
+        self.frame_size = 1 + num_gamepads * schema.size + Controller.CHECKSUM
+        self.frame = bytearray(self.frame_size)
+        self.frame[0] = Controller.HEADER
+        self.last_frame = bytearray(self.frame)
+        # Check byte and wire format, see app/protocol.py. Version 1 writes self.frame itself.
+        self.protocol = XorProtocol(self.frame)
+        self.sequence = 0   # Wire sequence number, sent by protocol version 2
+        self.send_times = [0.0] * 256   # Send time of each sequence number, see TelemetryReader
+        self.controller_state_data = memoryview(self.frame)[1:] # For sending through serial
+
+        self.send_policy = Controller.SendPolicy.ALWAYS
+        self.min_send_interval = Controller.DEFAULT_MIN_SEND_INTERVAL
+        self.heartbeat_interval = Controller.DEFAULT_HEARTBEAT_INTERVAL
+        self.pending_change = True  # Frame changed since it was last sent
+        self.last_send_time = float('-inf')
+        self.frames_sent = 0
+        self.frames_suppressed = 0
+        self.frames_dropped = 0     # Not taken by the transport, see SerialTransport
+        self.frames_throttled = 0   # Skipped to stay within the serial link's capacity
+        self.bytes_sent = 0
 
-        self.tick()
+        # Send budget of a serial link, see update_link_budget
+        self.link_capacity = 0      # Bytes/s frames may use, 0 for no limit (network transports)
+        self.send_credit = 0.0      # Bytes that may be sent right now
+        self.send_credit_time = 0.0
+        self.utilization = None
+        self.utilization_sample = (time.monotonic(), 0)
+        self.bytes_saved = 0
+
+        self.links = []     # Extra outputs fed the same frames, replaced (never mutated) under self.lock
+        self.latency_stats = None   # LatencyStats while instrumentation is enabled
+        self.recorder = None        # Recorder while a session is being recorded
+        self.publisher = None       # StatePublisher while the state is shared with other processes
+        # Last HISTORY_SECONDS of frames for plotting, fixed size whatever the tick rate
+        self.history = FrameHistory(self.frame_size, Controller.HISTORY_SECONDS * Controller.HISTORY_MAX_RATE)
+        self.lock = threading.RLock()   # Held by whichever thread runs tick(), see TickLoop
+        # Idle state, see update_idle. wakeup is set when an output appears, to end the TickLoop's idle wait.
+        self.idle = False
+        self.idle_since = None
+        self.idle_listeners = []
+        self.wakeup = threading.Event()
+        # Set when SDL reports a quit request (it turns SIGTERM into pygame.QUIT), see run_headless
+        self.quit_requested = threading.Event()
+
+        # SDL is brought up by the first event pump, see init_sdl
+        self.is_sdl_initialized = False
+
+        # Started by the caller, so the first port scan can wait until the window is shown
+        self.port_watcher = PortWatcher(self)
+        self.telemetry = TelemetryReader(self)
+
+        self.update_frame()
+
+    def init_sdl(self):
+        """
+        Initializes SDL on the calling thread. SDL requires events to be pumped on the thread that initialized video
+        (Windows and macOS enforce it), so this runs on the thread that ticks: TickLoop calls it before its first
+        tick, and process_events on first use when tick() is called directly.
+        """
+        if self.is_sdl_initialized:
+            return
+        # Only the subsystems we use: display (for the event queue, no window is opened) and joystick.
+        # pygame.init() would also bring up audio, fonts etc.
+        pygame.display.init()
+        pygame.joystick.init()
+        self.is_sdl_initialized = True
 
     def get_available_ports(self):
-        self.ports = serial.tools.list_ports.comports()
+        # Cached by the port watcher, never scans on the calling thread
+        self.ports = self.port_watcher.ports
         return [port.description for port in self.ports]
+
+    def refresh_ports(self):
+        self.port_watcher.request_scan()
     
     def is_serial_connected(self):
-        return self.ser is not None
+        return self.transport is not None
 
-    def serial_auto_reconnect_memory(self):
-        if self.port == '': # No memory
-            return
-        
-        devices = self.get_available_ports()
+    def should_auto_reconnect(self):
+        return (self.mode == Controller.Mode.AUTO_RECONNECT_MEMORY and self.port != ''
+                and not self.is_serial_connected())
 
-        if self.port not in devices:
-            return
-        try:
-            self.ser = serial.Serial(self.port, self.baudrate)
-        except serial.SerialException:
-            pass
-    
-    def serial_auto_reconnect(self):
-        if self.mode == Controller.Mode.AUTO_RECONNECT_MEMORY:
-            self.serial_auto_reconnect_memory()
+    def attach_transport(self, transport, port, baudrate):
+        """Hands a transport opened on another thread (see PortWatcher) to the controller."""
+        with self.lock:
+            if self.is_serial_connected() or not self.should_auto_reconnect() or port != self.port:
+                return False
+            self.transport = transport
+            self.baudrate = baudrate
+            self.update_link_budget()
+            self.pending_change = True
+            self.wake()
+            return True
 
     def set_serial_auto_reconnect(self, is_auto_reconnect):
         if is_auto_reconnect:
@@ -73,91 +189,405 @@ class Controller:
         else:
             self.mode = Controller.Mode.DISABLED_AUTO_CONNECT
 
+    def set_send_policy(self, policy, min_send_interval=None, heartbeat_interval=None):
+        self.send_policy = policy
+        if min_send_interval is not None:
+            self.min_send_interval = min_send_interval
+        if heartbeat_interval is not None:
+            self.heartbeat_interval = heartbeat_interval
+
+    def set_protocol(self, version):
+        with self.lock:
+            self.protocol = make_protocol(self.frame, version)
+            self.protocol.update()
+            for channel in self.gamepad_channels:
+                channel.set_protocol(version)
+            self.update_link_budget()
+            self.pending_change = True
+
+    def update_link_budget(self):
+        """Caps the send rate to what the serial link carries at its baud rate, see get_max_send_rate."""
+        if self.transport is not None and self.transport.needs_device:
+            self.link_capacity = self.baudrate / Controller.BITS_PER_BYTE * Controller.LINK_BUDGET
+        else:
+            self.link_capacity = 0
+        self.send_credit = self.protocol.wire_size
+        self.send_credit_time = time.monotonic()
+        self.utilization = None
+
+    def get_max_send_rate(self):
+        """:return: frames/s the serial link sustains within LINK_BUDGET, or None when there is no limit"""
+        if not self.link_capacity:
+            return None
+        return self.link_capacity / self.protocol.wire_size
+
+    def get_link_utilization(self):
+        """:return: share of the serial link's raw capacity used over the last UTILIZATION_WINDOW, or None"""
+        if not self.link_capacity:
+            return None
+        now = time.monotonic()
+        sample_time, sample_bytes = self.utilization_sample
+        if now - sample_time >= Controller.UTILIZATION_WINDOW:
+            capacity = self.baudrate / Controller.BITS_PER_BYTE
+            self.utilization = (self.bytes_sent - sample_bytes) / (now - sample_time) / capacity
+            self.utilization_sample = (now, self.bytes_sent)
+        return self.utilization
+
+    def remember_port(self, port, baudrate = DEFAULT_BAUDRATE):
+        # Port the watcher reconnects to in AUTO_RECONNECT_MEMORY mode
+        self.port = port
+        self.baudrate = baudrate
+        self.port_watcher.request_scan()
+
     def serial_connect(self, port, baudrate = DEFAULT_BAUDRATE):
+        """:param port: serial device name, or udp://host:port / tcp://host:port"""
         try:
-            self.ser = serial.Serial(port, baudrate)
+            # Opened before taking the lock, a TCP connect can take a while
+            transport = make_transport(port, baudrate)
+            transport.open()
+        except TransportError:
+            return
+        with self.lock:
+            self.serial_disconnect()
+            self.transport = transport
             self.port = port
             self.baudrate = baudrate
-        except serial.SerialException:
-            pass
+            self.update_link_budget()
+            self.pending_change = True  # Send the current state straight away
+            self.wake()
     
     def serial_disconnect(self):
         if self.is_serial_connected():
-            self.ser.close()
-            del self.ser
-            self.ser = None
+            self.transport.close()
+            self.transport = None
+            self.update_link_budget()
+
+    def add_link(self, port, baudrate = DEFAULT_BAUDRATE):
+        """Also sends every frame to port (serial or network), from its own writer thread, see Link."""
+        link = Link(port, baudrate)
+        link.start()
+        with self.lock:
+            self.links = self.links + [link]
+            self.pending_change = True
+            self.wake()
+        return link
+
+    def remove_link(self, link):
+        with self.lock:
+            self.links = [other for other in self.links if other is not link]
+        link.stop()
+
+    def stop_links(self):
+        for link in self.links:
+            self.remove_link(link)
+        with self.lock:
+            channels, self.gamepad_channels = self.gamepad_channels, []
+            self.all_gamepads = list(self.gamepads)
+            for channel in channels:
+                if channel.gamepad.is_connected():
+                    self.detach_joystick(channel.gamepad)
+        for channel in channels:
+            channel.link.stop()
+
+    def add_gamepad_channel(self, port, baudrate = DEFAULT_BAUDRATE):
+        """
+        Adds a gamepad that is not packed into the frame but sent in a frame of its own to port (serial or
+        network), e.g. a second robot with its own operator. It takes the next joystick once self.gamepads are all
+        taken.
+        """
+        channel = GamepadChannel(self.schema, port, baudrate)
+        channel.set_protocol(self.protocol.VERSION)
+        channel.link.start()
+        with self.lock:
+            self.gamepad_channels = self.gamepad_channels + [channel]
+            self.all_gamepads = self.all_gamepads + [channel.gamepad]
+            if self.spare_joysticks:
+                self.attach_joystick(self.spare_joysticks.pop(0))
+            self.pending_change = True
+            self.wake()
+        return channel
+
+    def has_outputs(self):
+        return self.is_serial_connected() or bool(self.links) or bool(self.gamepad_channels)
+
+    def get_link_stats(self):
+        return [link.get_stats() for link in self.links]
 
     def update_controller_state(self):
-        # Check if controller is still connected
+        self.process_events()
+
+        # In polling mode, sample every axis and button of each connected gamepad
+        if self.gamepads_by_id and self.input_mode == Controller.InputMode.POLLING:
+            self.poll_joysticks()
+
+        self.update_frame()
+
+    def is_joystick_connected(self):
+        return bool(self.gamepads_by_id)
+
+    def attach_joystick(self, joystick):
+        """Gives joystick the first free Gamepad, or keeps it as a spare until one is free."""
+        if joystick.get_instance_id() in self.gamepads_by_id:
+            return None
+        gamepad = next((gamepad for gamepad in self.all_gamepads if not gamepad.is_connected()), None)
+        if gamepad is None:
+            self.spare_joysticks.append(joystick)
+            return None
+        gamepad.attach(joystick)
+        self.gamepads_by_id[gamepad.instance_id] = gamepad
+        return gamepad
+
+    def detach_joystick(self, gamepad):
+        self.gamepads_by_id.pop(gamepad.instance_id, None)
+        gamepad.detach()
+        if self.spare_joysticks:
+            self.attach_joystick(self.spare_joysticks.pop(0))
+
+    def process_events(self):
+        # One event pump for every gamepad, events are routed by joystick instance ID
+        if not self.is_sdl_initialized:
+            self.init_sdl()
+        is_event_mode = self.input_mode == Controller.InputMode.EVENT
+        gamepads_by_id = self.gamepads_by_id
         for event in pygame.event.get():
-            if event.type == pygame.JOYDEVICEADDED and self.joysticks is None:
-                self.joysticks = pygame.joystick.Joystick(0)
-                self.joysticks.init()
-                self.num_buttons = self.joysticks.get_numbuttons()
-                self.num_axis = self.joysticks.get_numaxes()
-                return
-            elif event.type == pygame.JOYDEVICEREMOVED and self.joysticks is not None:
-                del self.joysticks
-                self.joysticks = None
-                return
-            
-        # Update controller state if connected
-        if self.joysticks is None:
-            return
-        try:
-            for i in range(min(Controller.MAX_NUM_JOY_AXIS, self.num_axis)):
-                raw_axis_value = self.joysticks.get_axis(i)
-                if i in (4, 5): # Triggers
-                    axis_value = int((raw_axis_value + 1) * 127)
-                    axis_value = max(0, min(255, axis_value))
-                    self.controller_state_data[i] = pack('B', axis_value)[0]
-                else:
-                    if abs(raw_axis_value) < self.JOY_THRESHOLD:
-                        raw_axis_value = 0
-                    axis_value = int(raw_axis_value * 127)
-                    axis_value = max(-128, min(127, axis_value))
-                    self.controller_state_data[i] = pack('b', axis_value)[0]
-
-            for i in range(min(Controller.MAX_NUM_BUTTONS, self.num_buttons)):
-                if self.joysticks.get_button(i):
-                    self.controller_state_data[Controller.MAX_NUM_JOY_AXIS + i // 8] |= 1 << (i % 8)
-                else:
-                    self.controller_state_data[Controller.MAX_NUM_JOY_AXIS + i // 8] &= ~(1 << (i % 8))
-            
-            if Controller.CHECKSUM == 1:
-                checksum = 0x00
-                for i in range(Controller.NUM_CONTROLLER_BYTES - 1):
-                    checksum ^= self.controller_state_data[i]
-                self.controller_state_data[-1] = checksum
-        except pygame.error:
-            del self.joysticks
-            self.joysticks = None
-        # Ignore hat for now
+            if event.type == pygame.QUIT:
+                self.quit_requested.set()
+                continue
+            if event.type == pygame.JOYDEVICEADDED:
+                self.attach_joystick(pygame.joystick.Joystick(event.device_index))
+                continue
+            gamepad = gamepads_by_id.get(getattr(event, 'instance_id', None))
+            if gamepad is None:
+                if event.type == pygame.JOYDEVICEREMOVED:
+                    self.spare_joysticks = [joystick for joystick in self.spare_joysticks
+                                            if joystick.get_instance_id() != event.instance_id]
+            elif event.type == pygame.JOYDEVICEREMOVED:
+                self.detach_joystick(gamepad)
+            elif is_event_mode:
+                gamepad.apply_event(event)
+
+    def update_frame(self):
+        # Encoding is one call to the schema's compiled encoder per gamepad, skipped while its state is unchanged
+        is_encoded = False
+        for gamepad in self.gamepads:
+            if gamepad.dirty:
+                gamepad.encode(self.frame)
+                is_encoded = True
+        if is_encoded and self.frame != self.last_frame:    # Polling marks every tick dirty, most are unchanged
+            self.protocol.update()
+            self.last_frame[:] = self.frame
+            self.pending_change = True
+        for channel in self.gamepad_channels:
+            if channel.update_frame():
+                self.pending_change = True
+
+    def poll_joysticks(self):
+        for gamepad in self.all_gamepads:
+            if gamepad.joystick is not None and not gamepad.poll():
+                self.detach_joystick(gamepad)
 
     def serial_send(self):
-        if not self.is_serial_connected():
+        if not self.has_outputs():
             return
         
-        try:
-            self.ser.write(bytearray([Controller.HEADER]))
-            self.ser.write(self.controller_state_data)
-        except serial.SerialException:
-            del self.ser
-            self.ser = None     
+        now = time.monotonic()
+        if self.send_policy == Controller.SendPolicy.ON_CHANGE:
+            elapsed = now - self.last_send_time
+            if elapsed < self.heartbeat_interval and not (self.pending_change and elapsed >= self.min_send_interval):
+                self.frames_suppressed += 1
+                self.bytes_saved += self.protocol.wire_size
+                return
+
+        wire = self.protocol.encode(self.sequence)
+        # The link budget only applies to the main port, fan-out links and gamepad channels pace themselves
+        is_throttled = self.transport is not None and not self.take_send_credit(now, len(wire))
+        if is_throttled:
+            self.frames_throttled += 1
+            if not self.links and not self.gamepad_channels:
+                return
+
+        self.send_times[self.sequence] = now
+        if self.links:
+            frame = bytes(wire)     # Shared by the link writer threads, the frame buffer is reused
+            for link in self.links:
+                link.submit(frame)
+        is_sent = True
+        if self.transport is not None and not is_throttled:
+            try:
+                dropped = self.transport.frames_dropped
+                self.transport.write(wire)
+                is_sent = self.transport.frames_dropped == dropped
+            except TransportError:
+                self.transport.close()
+                self.transport = None
+                self.update_link_budget()
+                self.port_watcher.request_scan()
+                if not self.links and not self.gamepad_channels:
+                    return
+        for channel in self.gamepad_channels:
+            channel.send()
+        self.sequence = (self.sequence + 1) & 0xFF
+        self.last_send_time = now
+        if is_throttled:
+            return      # Neither sent nor dropped on the main port, a pending change is retried on the next tick
+        if is_sent:
+            self.frames_sent += 1
+            self.bytes_sent += len(wire)
+            self.pending_change = False     # A dropped change is retried after min_send_interval
+        else:
+            self.frames_dropped += 1
+
+    def take_send_credit(self, now, wire_size):
+        """:return: whether the main port's link capacity has room for a frame of wire_size bytes now, see
+                 update_link_budget"""
+        if not self.link_capacity:
+            return True
+        # Token bucket in bytes, refilled at the link's capacity and holding at most two frames
+        credit = min(self.send_credit + (now - self.send_credit_time) * self.link_capacity, 2 * wire_size)
+        self.send_credit_time = now
+        if credit < wire_size:
+            self.send_credit = credit
+            return False
+        self.send_credit = credit - wire_size
+        return True
 
     def tick(self):
+        latency_stats = self.latency_stats     # Read once, the GUI thread may switch it off mid-tick
+        if latency_stats is not None:
+            self.tick_instrumented(latency_stats)
+            return
+
         self.update_controller_state()
+        self.store_frame()
 
-        if not self.is_serial_connected():
-            self.serial_auto_reconnect()
-        else:
+        # Reconnecting is handled by the port watcher thread (and by each link's writer thread)
+        if self.has_outputs():
+            self.serial_send()
+        self.update_idle()
+
+    def update_idle(self):
+        """
+        Goes idle after IDLE_DELAY without a gamepad and without an output, and back to active on the tick that
+        finds one. While idle the TickLoop only ticks at its IDLE_RATE, to pick up a gamepad being plugged in.
+        """
+        if self.gamepads_by_id or self.has_outputs():
+            self.idle_since = None
+            if self.idle:
+                self.set_idle(False)
+        elif self.idle_since is None:
+            self.idle_since = time.monotonic()
+        elif not self.idle and time.monotonic() - self.idle_since >= Controller.IDLE_DELAY:
+            self.set_idle(True)
+
+    def set_idle(self, is_idle):
+        self.idle = is_idle
+        for callback in self.idle_listeners:
+            callback(is_idle)
+
+    def add_idle_listener(self, callback):
+        """
+        :param callback: called as callback(is_idle) from the tick thread. Qt code should forward it through a
+                         signal.
+        """
+        self.idle_listeners.append(callback)
+
+    def wake(self):
+        """Ends an idle wait of the TickLoop, so a new output is served from the next frame."""
+        self.wakeup.set()
+
+    def store_frame(self):
+        # Every tick's frame goes to the history, and to the recording and shared state when enabled
+        now = time.monotonic()
+        self.history.record(self.frame, now)
+        if self.recorder is not None:
+            self.recorder.record_frame(self.frame)
+        if self.publisher is not None:
+            self.publisher.publish(self.frame, now)
+
+    def tick_instrumented(self, stats):
+        # Same as tick(), with every stage timed into stats
+        clock = time.perf_counter_ns
+        start = clock()
+        self.process_events()
+        events_done = clock()
+        if self.gamepads_by_id and self.input_mode == Controller.InputMode.POLLING:
+            self.poll_joysticks()
+        sample_done = clock()
+        self.update_frame()
+        encode_done = clock()
+        self.store_frame()
+        store_done = clock()
+        stats.record('event_pump', events_done - start)
+        stats.record('sample', sample_done - events_done)
+        stats.record('encode', encode_done - sample_done)
+        stats.record('store', store_done - encode_done)
+
+        if self.has_outputs():
             self.serial_send()
+            write_done = clock()
+            stats.record('write', write_done - store_done)
+        self.update_idle()
+        stats.record('tick', clock() - start)
+
+    def start_recording(self, path):
+        with self.lock:
+            self.stop_recording()
+            # Frames are recorded in the version 1 layout, whose check byte is only kept up to date by version 1
+            checksum_size = Controller.CHECKSUM if self.protocol.VERSION == XorProtocol.VERSION else 0
+            num_gamepads = len(self.gamepads)
+            self.recorder = Recorder(path, self.frame_size, num_gamepads * len(self.axes),
+                                     num_gamepads * ((len(self.buttons) + 7) // 8), checksum_size, Controller.HEADER)
+
+    def stop_recording(self):
+        with self.lock:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+
+    def start_publishing(self, name):
+        """Shares every tick's frame with other local processes, see StateReader in app/sharedstate.py."""
+        with self.lock:
+            self.stop_publishing()
+            from .sharedstate import StatePublisher     # Loads multiprocessing.shared_memory, only needed here
+            self.publisher = StatePublisher(self.frame_size, name)
+
+    def stop_publishing(self):
+        with self.lock:
+            if self.publisher is not None:
+                self.publisher.close()
+                self.publisher = None
+
+    def set_latency_stats_enabled(self, is_enabled):
+        with self.lock:
+            if is_enabled and self.latency_stats is None:
+                self.latency_stats = LatencyStats()
+            elif not is_enabled:
+                self.latency_stats = None
+
+    def get_latency_stats(self):
+        """:return: per-stage {'count', 'p50', 'p99', 'max'} in microseconds, or None when disabled"""
+        stats = self.latency_stats
+        return stats.summary() if stats is not None else None
+
+    def get_send_stats(self):
+        return {
+            'frames_sent': self.frames_sent,
+            'frames_suppressed': self.frames_suppressed,
+            'bytes_saved': self.bytes_saved,
+            'frames_dropped': self.frames_dropped,
+            'frames_throttled': self.frames_throttled,
+        }
 
     def get_connection_status(self):
         return f'Uart: {"Connected" if self.is_serial_connected() else "Disconnected"}'
     
     def get_controller_state(self):
-        if self.joysticks is None:
+        if not self.is_joystick_connected():
             return None
         
-        return self.controller_state_data
\ No newline at end of file
+        return self.controller_state_data
+
+    def get_controller_state_snapshot(self):
+        # Copy taken under the lock so readers on other threads never see a half-updated frame
+        with self.lock:
+            return bytes(self.controller_state_data)
@@ -0,0 +1,177 @@
+from struct import Struct
+
+from .protocol import HEADER, SLIP_END_BYTES, SlipProtocol, crc16, slip_unescape
+from .schema import DEFAULT_SCHEMA, FrameSchema
+
+
+def window_xor(value, width):
+    """
+    :return: integer whose byte i is the XOR of bytes i..i+width-1 of value (little-endian), computed with
+             O(log width) big-integer shifts instead of a loop over the bytes
+    """
+    result, covered = 0, 0
+    block, block_width = value, 1   # Byte i of block is the XOR of bytes i..i+block_width-1
+    while width:
+        if width & 1:
+            result ^= block >> (8 * covered)
+            covered += block_width
+        width >>= 1
+        if width:
+            block ^= block >> (8 * block_width)
+            block_width *= 2
+    return result
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for version 1 frames, the receiving side of Controller.serial_send.
+
+    Wire format: HEADER (0x9C), the schema payload, then the XOR of the payload bytes. HEADER may also occur inside
+    a payload, so a receiver takes the first HEADER byte as a frame start, checks the XOR and on a mismatch resyncs
+    on the next HEADER byte after it.
+
+    feed() accepts chunks of any size. Runs of back-to-back frames, the normal case for a capture, are validated in
+    bulk: headers through a strided slice, checksums through one window_xor over the buffer, payloads through one
+    Struct.iter_unpack. Runs are checked MIN_RUN frames at a time, doubling while they stay valid, so a resync after
+    noise only costs the frames it looks at and noisy input still decodes in linear time.
+    """
+    MIN_RUN = 16    # Frames checked at once after a resync
+
+    def __init__(self, schema: FrameSchema = None):
+        if schema is None:
+            schema = FrameSchema.from_dict(DEFAULT_SCHEMA)
+        self.schema = schema
+        payload_format = schema.struct.format[1:] if schema.struct is not None else None
+        self.set_layout(HEADER, tuple(field.name for field in schema.fields), schema.size, payload_format)
+        self.reset()
+
+    def set_layout(self, header, field_names, payload_size, payload_format=None):
+        """:param payload_format: struct format of the payload without byte order, None to use schema.decode_values"""
+        self.header = header
+        self.header_run = bytes((header,))
+        self.field_names = field_names
+        self.frame_size = 1 + payload_size + 1
+        # Header and checksum are skipped as pad bytes so each unpacked tuple holds only the field values
+        self.frame_struct = Struct(f'<x{payload_format}x') if payload_format is not None else None
+
+    def reset(self):
+        """Drops buffered bytes and clears the counters, e.g. after switching to another port."""
+        self.buffer = bytearray()
+        self.frames = 0
+        self.bad_frames = 0     # Header bytes whose checksum did not match
+        self.skipped_bytes = 0  # Bytes outside any valid frame
+
+    def feed(self, data):
+        """:return: list of value tuples (in schema field order, see field_names) for every valid frame completed"""
+        buffer = self.buffer
+        buffer += data
+        frame_size = self.frame_size
+        # Byte i is the XOR of bytes i..i + frame_size - 2, computed once for every resync below
+        checks = window_xor(int.from_bytes(buffer, 'little'), frame_size - 1).to_bytes(len(buffer), 'little')
+        values = []
+        position = 0
+        run_limit = FrameDecoder.MIN_RUN
+        with memoryview(buffer) as view:
+            while True:
+                start = buffer.find(self.header, position)
+                if start == -1:
+                    self.skipped_bytes += len(buffer) - position
+                    position = len(buffer)
+                    break
+                self.skipped_bytes += start - position
+                position = start
+                count = min((len(buffer) - start) // frame_size, run_limit)
+                if count == 0:
+                    break
+
+                valid = self.count_valid(view, checks, start, count)
+                if valid:
+                    self.decode_run(view[start:start + valid * frame_size], valid, values)
+                    position = start + valid * frame_size
+                if valid == count:
+                    run_limit *= 2
+                    continue
+                run_limit = FrameDecoder.MIN_RUN
+                if buffer[position] == self.header:
+                    # Header in place but a checksum mismatch, resync on the next HEADER
+                    self.bad_frames += 1
+                    self.skipped_bytes += 1
+                    position += 1
+        del buffer[:position]
+        self.frames += len(values)
+        return values
+
+    def count_valid(self, view, checks, start, count):
+        """
+        :param checks: window XOR of the buffer, see feed()
+        :return: number of leading frames of the count back-to-back frames at start with a header and valid checksum
+        """
+        frame_size = self.frame_size
+        end = start + count * frame_size
+        headers = view[start:end:frame_size].tobytes()
+        count -= len(headers.lstrip(self.header_run))
+        if count == 0:
+            return 0
+        # The XOR of payload and checksum is zero for a valid frame, so the check of the byte after each header must
+        # be zero
+        flags = checks[start + 1:start + count * frame_size:frame_size]
+        return count - len(flags.lstrip(b'\0'))
+
+    def decode_run(self, run, count, values):
+        if self.frame_struct is not None:
+            values += self.frame_struct.iter_unpack(run)
+            return
+        decode_values, frame_size = self.schema.decode_values, self.frame_size
+        for offset in range(0, count * frame_size, frame_size):
+            values.append(decode_values(run[offset + 1:offset + frame_size - 1]))
+
+    def decode(self, values):
+        """:return: {field name: value} for one tuple returned by feed()"""
+        return dict(zip(self.field_names, values))
+
+
+class SlipFrameDecoder(FrameDecoder):
+    """
+    Incremental decoder for version 2 frames (see SlipProtocol): SLIP_END, the escaped payload, sequence number and
+    CRC, SLIP_END. Frames are split with bytes.split on SLIP_END, so only complete frames are looked at in Python.
+    Gaps in the sequence numbers are counted in lost_frames.
+    """
+
+    def __init__(self, schema: FrameSchema = None):
+        super().__init__(schema)
+        self.decoded_size = self.schema.size + 1 + SlipProtocol.CRC_SIZE
+        self.sequence = None
+        self.lost_frames = 0
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        end = buffer.rfind(SLIP_END_BYTES)
+        if end == -1:
+            return []
+        chunks = buffer[:end].split(SLIP_END_BYTES)
+        del buffer[:end]    # Keeps the SLIP_END that starts the next frame
+
+        values = []
+        payload_size, decoded_size = self.schema.size, self.decoded_size
+        decode_values = self.schema.decode_values
+        for chunk in chunks:
+            if not chunk:
+                continue
+            frame = slip_unescape(chunk)
+            if len(frame) != decoded_size:
+                self.bad_frames += 1
+                self.skipped_bytes += len(chunk)
+                continue
+            if crc16(frame[:-2]) != frame[-2] << 8 | frame[-1]:
+                self.bad_frames += 1
+                self.skipped_bytes += len(chunk)
+                continue
+
+            sequence = frame[payload_size]
+            if self.sequence is not None:
+                self.lost_frames += (sequence - self.sequence - 1) & 0xFF
+            self.sequence = sequence
+            values.append(decode_values(frame))
+        self.frames += len(values)
+        return values
@@ -0,0 +1,368 @@
+"""
+The input/transmit engine (Controller plus TickLoop), in process or in a process of its own.
+
+With --engine-process the GUI only views: the engine process polls the gamepad and writes frames, publishes each
+frame through shared memory (see app/sharedstate.py) and answers commands (connect, disconnect, settings) and
+status requests over a pipe. GUI garbage collection or heavy widget work then cannot delay a frame.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from enum import Enum
+
+from .app import Controller
+from .hotplug import PortWatcher
+from .loop import TickLoop
+from .schema import DEFAULT_SCHEMA, FrameSchema
+from .sharedstate import DEFAULT_NAME, SharedStateError, StateReader
+
+PortInfo = namedtuple('PortInfo', 'device description')
+LinkInfo = namedtuple('LinkInfo', 'port')
+
+
+def get_recording_path(path, restart):
+    """
+    :param restart: how many times the engine has been restarted
+    :return: where the engine records, a new file per restart (session.1.bin, ...) so that a restarted engine does
+             not truncate the session recorded before the crash
+    """
+    if not restart:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}.{restart}{extension}'
+
+
+def create_engine(args, schema=None, restart=0):
+    """
+    :param restart: how many times the engine has been restarted
+    :return: (Controller, TickLoop) configured from the command line options, not started yet
+    """
+    mode = Controller.Mode.DISABLED_AUTO_CONNECT if args.no_reconnect else Controller.Mode.AUTO_RECONNECT_MEMORY
+    controller = Controller(mode, Controller.InputMode[args.input_mode.upper()], schema, args.gamepads)
+    controller.set_protocol(args.protocol)
+    controller.set_send_policy(Controller.SendPolicy[args.send_policy.upper()], heartbeat_interval=args.heartbeat)
+    controller.set_latency_stats_enabled(args.latency_stats)
+    if args.port:
+        with controller.lock:
+            controller.serial_connect(args.port, args.baudrate)
+            if not controller.is_serial_connected():
+                # Let the port watcher connect once the device shows up
+                controller.remember_port(args.port, args.baudrate)
+
+    for port in args.link:
+        controller.add_link(port, args.baudrate)
+    for port in args.gamepad_port:
+        controller.add_gamepad_channel(port, args.baudrate)
+
+    if args.record:
+        controller.start_recording(get_recording_path(args.record, restart))
+    if args.publish:
+        controller.start_publishing(args.publish)
+    return controller, TickLoop(controller, args.rate)
+
+
+def get_status(controller, tick_loop):
+    return {
+        'serial_connected': controller.is_serial_connected(),
+        'joystick_connected': controller.is_joystick_connected(),
+        'idle': controller.idle,
+        'port': controller.port,
+        'baudrate': controller.baudrate,
+        'ports': [PortInfo(port.device, port.description) for port in controller.port_watcher.ports],
+        'loop_stats_text': tick_loop.get_stats_text(),
+        'send_stats': controller.get_send_stats(),
+        'link_utilization': controller.get_link_utilization(),
+        'max_send_rate': controller.get_max_send_rate(),
+        'link_stats': controller.get_link_stats(),
+        'latency_stats': controller.get_latency_stats(),
+        'telemetry_stats': controller.telemetry.get_stats(),
+    }
+
+
+def run_engine(args, conn, restart=0):
+    """Entry point of the engine process. Returns once told to stop or when the GUI process is gone."""
+    schema = FrameSchema.load(args.schema, Controller.JOY_THRESHOLD) if args.schema else None
+    controller, tick_loop = create_engine(args, schema, restart)
+    tick_loop.start()
+    controller.telemetry.start()
+    controller.port_watcher.start()
+    try:
+        conn.send(('ready', os.getpid()))
+        while True:
+            try:
+                command, *arguments = conn.recv()
+            except (EOFError, OSError):
+                return  # The GUI process exited or crashed
+            if command == 'stop':
+                return
+            elif command == 'connect':
+                controller.serial_connect(*arguments)
+            elif command == 'disconnect':
+                with controller.lock:
+                    controller.serial_disconnect()
+            elif command == 'auto_reconnect':
+                controller.set_serial_auto_reconnect(*arguments)
+            elif command == 'refresh_ports':
+                controller.refresh_ports()
+            elif command == 'latency_stats':
+                controller.set_latency_stats_enabled(*arguments)
+            conn.send(get_status(controller, tick_loop))
+    finally:
+        tick_loop.stop()
+        controller.telemetry.stop()
+        controller.port_watcher.stop()
+        with controller.lock:
+            controller.stop_recording()
+            controller.stop_publishing()
+            controller.serial_disconnect()
+        controller.stop_links()
+
+
+class RemotePortWatcher:
+    def __init__(self):
+        self.ports = []
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """:param callback: called as callback(event, data) on the GUI thread, see PortWatcher.add_listener"""
+        self._listeners.append(callback)
+
+    def update(self, ports):
+        if ports != self.ports:
+            self.ports = ports
+            for callback in self._listeners:
+                callback(PortWatcher.Event.PORTS_CHANGED, [port.description for port in ports])
+
+
+class RemoteTelemetry:
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    def get_stats(self):
+        return self.proxy.get_status()['telemetry_stats']
+
+
+class EngineProxy:
+    """
+    Runs the engine in a child process and stands in for both its Controller and its TickLoop in MainWindow.
+
+    Frames are read from shared memory, everything else comes from a status reply fetched at most every
+    STATUS_INTERVAL. The child exits when the GUI process goes away (its end of the pipe closes). If the child
+    crashes or stops answering it is killed and started again after RESTART_INTERVAL, reconnecting to the port it
+    was connected to. Only the GUI thread may use the proxy.
+    """
+    STATUS_INTERVAL = 0.1   # s
+    STARTUP_TIMEOUT = 15.0
+    COMMAND_TIMEOUT = 3.0   # A TCP connect alone may take TcpTransport.CONNECT_TIMEOUT
+    RESTART_INTERVAL = 1.0
+
+    class State(Enum):
+        STARTING = 1    # Process started, waiting for its 'ready' message
+        RUNNING = 2
+        DOWN = 3        # Not started yet, or crashed and waiting for restart_time
+
+    def __init__(self, args, schema=None):
+        self.args = args
+        if not self.args.publish:
+            self.args.publish = f'{DEFAULT_NAME}_{os.getpid()}'
+        if schema is None:
+            schema = FrameSchema.from_dict(DEFAULT_SCHEMA, Controller.JOY_THRESHOLD)
+        self.schema = schema
+        self.state_size = args.gamepads * schema.size + Controller.CHECKSUM   # As Controller.controller_state_data
+        self.lock = threading.RLock()   # Kept for callers written against Controller, commands are serialized
+        self.links = [LinkInfo(port) for port in args.link]
+        self.port_watcher = RemotePortWatcher()
+        self.telemetry = RemoteTelemetry(self)
+        self.history = None     # Frames are only shared as the latest one, see StateReader
+        self.idle = False
+        self.idle_listeners = []
+        self.state = EngineProxy.State.DOWN
+        self.process = None
+        self.conn = None
+        self.reader = None
+        self.started_time = 0.0
+        self.restart_time = 0.0
+        self.restarts = 0
+        self.status_time = float('-inf')
+        self.status = self.get_down_status()
+
+    @property
+    def ports(self):
+        return self.port_watcher.ports
+
+    def get_down_status(self):
+        return {
+            'serial_connected': False,
+            'joystick_connected': False,
+            'idle': False,
+            'port': self.args.port,
+            'baudrate': self.args.baudrate,
+            'ports': self.port_watcher.ports,
+            'loop_stats_text': f'Engine {self.state.name.lower()}',
+            'send_stats': {'frames_sent': 0, 'frames_suppressed': 0, 'bytes_saved': 0, 'frames_dropped': 0,
+                           'frames_throttled': 0},
+            'link_utilization': None,
+            'max_send_rate': None,
+            'link_stats': [{'port': link.port, 'connected': False, 'rate': 0.0, 'frames_sent': 0,
+                            'frames_replaced': 0, 'frames_dropped': 0} for link in self.links],
+            'latency_stats': None,
+            'telemetry_stats': None,
+        }
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')  # No inherited Qt or SDL state
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_engine, args=(self.args, child_conn, self.restarts), name='Engine',
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.state = EngineProxy.State.STARTING
+        self.started_time = time.monotonic()
+
+    def stop(self, timeout=2.0):
+        if self.state != EngineProxy.State.DOWN:
+            try:
+                self.conn.send(('stop',))
+            except OSError:
+                pass
+            self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.state = EngineProxy.State.DOWN
+        self.status = self.get_down_status()
+        self.set_idle(False)
+
+    def restart(self):
+        self.kill()
+        self.restarts += 1
+        self.restart_time = time.monotonic() + EngineProxy.RESTART_INTERVAL
+
+    def command(self, *command):
+        """:return: the engine's status after the command, None while it is not running"""
+        if self.state != EngineProxy.State.RUNNING:
+            return None
+        try:
+            self.conn.send(command)
+            if not self.conn.poll(EngineProxy.COMMAND_TIMEOUT):
+                raise TimeoutError
+            status = self.conn.recv()
+        except (OSError, EOFError, TimeoutError):
+            self.restart()
+            return None
+        self.set_status(status)
+        return status
+
+    def set_idle(self, is_idle):
+        if is_idle != self.idle:
+            self.idle = is_idle
+            for callback in self.idle_listeners:
+                callback(is_idle)
+
+    def set_status(self, status):
+        self.set_idle(status['idle'])
+        self.status = status
+        self.status_time = time.monotonic()
+        self.port_watcher.update(status['ports'])
+        # Where a restarted engine reconnects to
+        if status['serial_connected'] or not self.args.no_reconnect:
+            self.args.port, self.args.baudrate = status['port'], status['baudrate']
+
+    def get_status(self):
+        now = time.monotonic()
+        if now - self.status_time < EngineProxy.STATUS_INTERVAL:
+            return self.status
+        self.status_time = now
+        if self.state == EngineProxy.State.DOWN:
+            if now >= self.restart_time:
+                self.start()
+        elif self.state == EngineProxy.State.STARTING:
+            if self.conn.poll(0):
+                try:
+                    self.conn.recv()    # ('ready', pid), the shared state is published from now on
+                    self.reader = StateReader(self.args.publish)
+                    self.state = EngineProxy.State.RUNNING
+                except (OSError, EOFError, SharedStateError):
+                    self.restart()
+            elif not self.process.is_alive() or now - self.started_time > EngineProxy.STARTUP_TIMEOUT:
+                self.restart()
+        else:
+            self.command('status')
+        return self.status
+
+    # Controller interface used by MainWindow, SettingWindow and the panels
+
+    def is_serial_connected(self):
+        return self.get_status()['serial_connected']
+
+    def is_joystick_connected(self):
+        return self.get_status()['joystick_connected']
+
+    def get_controller_state_snapshot(self):
+        self.get_status()
+        if self.reader is None:
+            return bytes(self.state_size)
+        try:
+            _, _, frame = self.reader.read()
+        except SharedStateError:
+            self.restart()
+            return bytes(self.state_size)
+        return bytes(frame[1:])
+
+    def add_idle_listener(self, callback):
+        """:param callback: called as callback(is_idle) on the GUI thread, polled with the status"""
+        self.idle_listeners.append(callback)
+
+    def get_available_ports(self):
+        self.get_status()
+        return [port.description for port in self.ports]
+
+    def refresh_ports(self):
+        self.command('refresh_ports')
+
+    def serial_connect(self, port, baudrate=Controller.DEFAULT_BAUDRATE):
+        self.command('connect', port, baudrate)
+
+    def serial_disconnect(self):
+        self.command('disconnect')
+
+    def set_serial_auto_reconnect(self, is_auto_reconnect):
+        self.args.no_reconnect = not is_auto_reconnect
+        self.command('auto_reconnect', is_auto_reconnect)
+
+    def set_latency_stats_enabled(self, is_enabled):
+        self.args.latency_stats = is_enabled
+        self.command('latency_stats', is_enabled)
+
+    def get_latency_stats(self):
+        return self.get_status()['latency_stats']
+
+    def get_send_stats(self):
+        return self.get_status()['send_stats']
+
+    def get_link_utilization(self):
+        return self.get_status()['link_utilization']
+
+    def get_max_send_rate(self):
+        return self.get_status()['max_send_rate']
+
+    def get_link_stats(self):
+        return self.get_status()['link_stats']
+
+    # TickLoop interface used by MainWindow
+
+    def get_stats_text(self):
+        text = self.get_status()['loop_stats_text']
+        return f'{text} (engine restarts: {self.restarts})' if self.restarts else text
@@ -0,0 +1,118 @@
+import pygame
+
+from .links import Link
+from .protocol import HEADER, make_protocol
+
+
+class Gamepad:
+    """
+    Input state of one gamepad position, e.g. the driver's or the manipulator's pad.
+
+    The state buffers belong to the position rather than to the physical joystick, so a pad that is unplugged and
+    replaced keeps its place in the frame. offset is where its payload starts in the frame it is encoded into.
+    """
+
+    def __init__(self, schema, offset=1):
+        self.schema = schema
+        self.offset = offset
+        self.joystick = None
+        self.instance_id = None
+        self.num_axis = 0
+        self.num_buttons = 0
+        self.num_hats = 0
+        self.axes = schema.initial_axes()
+        self.buttons = [0] * schema.num_buttons
+        self.hats = [(0, 0)] * schema.num_hats
+        # Low-pass filtered axes the payload is encoded from when the schema smooths any axis
+        self.filtered_axes = list(self.axes) if schema.smooth is not None else None
+        self.dirty = True   # Set when the input state changed and the payload needs encoding
+
+    def is_connected(self):
+        return self.joystick is not None
+
+    def attach(self, joystick):
+        joystick.init()
+        self.joystick = joystick
+        self.instance_id = joystick.get_instance_id()
+        self.num_axis = joystick.get_numaxes()
+        self.num_buttons = joystick.get_numbuttons()
+        self.num_hats = joystick.get_numhats()
+        self.poll()     # Pick up the initial state, events only report changes
+
+    def detach(self):
+        self.joystick = None
+        self.instance_id = None
+
+    def poll(self):
+        """:return: False when the joystick is gone"""
+        joystick = self.joystick
+        try:
+            axes, buttons, hats = self.axes, self.buttons, self.hats
+            for i in range(min(len(axes), self.num_axis)):
+                axes[i] = joystick.get_axis(i)
+            for i in range(min(len(buttons), self.num_buttons)):
+                buttons[i] = joystick.get_button(i)
+            for i in range(min(len(hats), self.num_hats)):
+                hats[i] = joystick.get_hat(i)
+            self.dirty = True
+            return True
+        except pygame.error:
+            return False
+
+    def apply_event(self, event):
+        if event.type == pygame.JOYAXISMOTION:
+            if event.axis < len(self.axes):
+                self.axes[event.axis] = event.value
+                self.dirty = True
+        elif event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+            if event.button < len(self.buttons):
+                self.buttons[event.button] = 1 if event.type == pygame.JOYBUTTONDOWN else 0
+                self.dirty = True
+        elif event.type == pygame.JOYHATMOTION:
+            if event.hat < len(self.hats):
+                self.hats[event.hat] = event.value
+                self.dirty = True
+
+    def encode(self, frame):
+        if self.filtered_axes is None:
+            self.schema.encode(frame, self.offset, self.axes, self.buttons, self.hats)
+            self.dirty = False
+        else:
+            # Stays dirty while the filter is settling, so the frame keeps following it without new input
+            self.dirty = self.schema.smooth(self.axes, self.filtered_axes)
+            self.schema.encode(frame, self.offset, self.filtered_axes, self.buttons, self.hats)
+
+
+class GamepadChannel:
+    """
+    A gamepad with a frame of its own, sent to its own port through a Link instead of being packed into the
+    Controller's frame. Uses the same wire protocol as the Controller, with its own sequence numbers.
+    """
+
+    def __init__(self, schema, port, baudrate):
+        self.gamepad = Gamepad(schema)
+        self.frame = bytearray(1 + schema.size + 1)   # Header, payload, check byte
+        self.frame[0] = HEADER
+        self.last_frame = bytearray(self.frame)
+        self.protocol = make_protocol(self.frame)
+        self.sequence = 0
+        self.link = Link(port, baudrate)
+
+    def set_protocol(self, version):
+        self.protocol = make_protocol(self.frame, version)
+        self.protocol.update()
+
+    def update_frame(self):
+        """:return: True when the frame changed"""
+        if not self.gamepad.dirty:
+            return False
+        self.gamepad.encode(self.frame)
+        if self.frame == self.last_frame:
+            return False
+        self.protocol.update()
+        self.last_frame[:] = self.frame
+        return True
+
+    def send(self):
+        self.link.submit(bytes(self.protocol.encode(self.sequence)))
+        self.sequence = (self.sequence + 1) & 0xFF
@@ -1,14 +1,25 @@
 from PyQt6.QtGui import QKeyEvent
-from PyQt6.QtWidgets import QMainWindow
-from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QMainWindow, QProgressBar
+from PyQt6.QtCore import QTimer, pyqtSignal
 
 from .ui.appgui import Ui_MainWindow
 from .setting_gui import SettingWindow
 from .app import Controller
+from .hotplug import PortWatcher
+from .loop import TickLoop
+from .panels import LatencyPanel, LinksPanel, PlotPanel, TelemetryPanel
 
 
 class MainWindow(QMainWindow, Ui_MainWindow):
-    def __init__(self, controller: Controller, parent=None, update_interval=20):
+    ports_changed = pyqtSignal()
+    idle_changed = pyqtSignal(bool)
+    DEFAULT_DISPLAY_RATE = 50   # Hz, independent of the TickLoop send rate
+    IDLE_DISPLAY_RATE = 2   # Hz while the controller is idle, nothing on screen changes then
+    CONNECTED_STYLE = 'background-color: green; color: white;'
+    DISCONNECTED_STYLE = 'background-color: red; color: white;'
+
+    def __init__(self, controller: Controller, tick_loop: TickLoop, parent=None,
+                 display_rate=DEFAULT_DISPLAY_RATE):
         super().__init__(parent)
         self.setupUi(self)
 
@@ -17,10 +28,62 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.connect_btn.clicked.connect(self.connect_btn_clicked)
 
         self.controller = controller
+        self.tick_loop = tick_loop
+        self.value_labels = {
+            'lx': self.joy_lx_label,
+            'ly': self.joy_ly_label,
+            'rx': self.joy_rx_label,
+            'ry': self.joy_ry_label,
+            'l2': self.trigger_l2_label,
+            'r2': self.trigger_r2_label,
+        }
+        # Port watcher callbacks arrive on its own thread, the signal queues them onto the GUI thread
+        self.ports_changed.connect(self.setting_window.port_group_box_update)
+        self.controller.port_watcher.add_listener(self.port_watcher_event)
+        # Last rendered state. Widgets are only touched when their value changed, restyling is expensive in Qt.
+        self.label_texts = {}
+        self.is_uart_connected = None
+        self.is_controller_connected = None
+        self.last_state = None
+        # The timer only refreshes the display, Controller.tick() runs on the TickLoop thread
         self.timer = QTimer()
         self.timer.timeout.connect(self.update)
-        self.timer.setInterval(update_interval)
+        self.display_rate = display_rate
+        self.is_idle = False
+        self.set_display_rate(display_rate)
         self.timer.start()
+        # Idle changes arrive on the tick thread, like the port watcher's
+        self.idle_changed.connect(self.set_idle)
+        self.controller.add_idle_listener(self.idle_changed.emit)
+
+        # Share of the serial link's capacity in use
+        self.link_load_bar = QProgressBar(self.centralwidget)
+        self.link_load_bar.setMaximumHeight(16)
+        self.link_load_bar.setValue(0)
+        self.link_load_bar.setFormat('Link load: -')
+        self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.widget) + 1, self.link_load_bar)
+
+        self.latency_panel = LatencyPanel(controller, self.centralwidget)
+        self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.widget_3), self.latency_panel)
+        self.telemetry_panel = TelemetryPanel(controller, self.centralwidget)
+        self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.widget_3), self.telemetry_panel)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.telemetry_panel.update_stats)
+        self.stats_timer.timeout.connect(self.latency_panel.update_stats)
+        self.stats_timer.timeout.connect(self.display_link_load)
+        if controller.links:
+            self.links_panel = LinksPanel(controller, self.centralwidget)
+            self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.widget_3), self.links_panel)
+            self.stats_timer.timeout.connect(self.links_panel.update_stats)
+        # The frame history lives in the engine process with --engine-process, the plot needs it in this one
+        self.plot_panel = None
+        if controller.history is not None:
+            self.plot_panel = PlotPanel(controller, self.centralwidget)
+            self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.widget_3), self.plot_panel)
+        self.stats_timer.setInterval(500)
+        self.stats_timer.start()
+        # Make room for the panels added to the designer layout
+        self.resize(self.width(), max(self.height(), self.sizeHint().height()))
 
     def setting_btn_clicked(self):
         self.setting_window.show()
@@ -28,7 +91,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def connect_btn_clicked(self):
         if self.controller.is_serial_connected():
             self.setting_window.auto_reconnect_check.setChecked(False)
-            self.controller.serial_disconnect()
+            with self.controller.lock:
+                self.controller.serial_disconnect()
         else:
             current_port_description = self.setting_window.get_selected_port()
             port = ''
@@ -36,57 +100,109 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             #     if port.description == current_port_description:
             #         port = port.device
             #         break
+            # A typed entry that is not a listed port is used as is, e.g. udp://192.168.4.1:9000
             port = next(
-                (port.device for port in self.controller.ports if port.description == current_port_description), '')
+                (port.device for port in self.controller.ports if port.description == current_port_description),
+                current_port_description)
 
             baudrate = self.setting_window.get_selected_baudrate()
             self.controller.serial_connect(port, baudrate)
 
+    def port_watcher_event(self, event, data):
+        if event == PortWatcher.Event.PORTS_CHANGED:
+            self.ports_changed.emit()
+
+    def set_label_text(self, label, text):
+        if self.label_texts.get(label) != text:
+            label.setText(text)
+            self.label_texts[label] = text
+
     def set_uart_connect_text(self):
-        if self.controller.is_serial_connected():
+        is_connected = self.controller.is_serial_connected()
+        if is_connected == self.is_uart_connected:
+            return
+        self.is_uart_connected = is_connected
+        if is_connected:
             self.uart_connection_status.setText('UART: Connected')
-            self.uart_connection_status.setStyleSheet(
-                'background-color: green; color: white;')
+            self.uart_connection_status.setStyleSheet(MainWindow.CONNECTED_STYLE)
             self.connect_btn.setText('Disconnect')
         else:
             self.uart_connection_status.setText('UART: Disconnected')
-            self.uart_connection_status.setStyleSheet(
-                'background-color: red; color: white;')
+            self.uart_connection_status.setStyleSheet(MainWindow.DISCONNECTED_STYLE)
             self.connect_btn.setText('Connect')
 
     def set_controller_connect_text(self):
-        if self.controller.joysticks is not None:
+        is_connected = self.controller.is_joystick_connected()
+        if is_connected == self.is_controller_connected:
+            return
+        self.is_controller_connected = is_connected
+        if is_connected:
             self.controller_connection_status.setText('Controller: Connected')
-            self.controller_connection_status.setStyleSheet(
-                'background-color: green; color: white;')
+            self.controller_connection_status.setStyleSheet(MainWindow.CONNECTED_STYLE)
         else:
             self.controller_connection_status.setText(
                 'Controller: Disconnected')
-            self.controller_connection_status.setStyleSheet(
-                'background-color: red; color: white;')
+            self.controller_connection_status.setStyleSheet(MainWindow.DISCONNECTED_STYLE)
 
     def display_controller_state(self):
-        self.joy_lx_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[0:1], "big", signed=True)}')
-        self.joy_ly_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[1:2], "big", signed=True)}')
-        self.joy_rx_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[2:3], "big", signed=True)}')
-        self.joy_ry_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[3:4], "big", signed=True)}')
-        self.trigger_l2_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[4:5], "big")}')
-        self.trigger_r2_label.setText(
-            f'{int.from_bytes(self.controller.controller_state_data[5:6], "big")}')
-        self.button_state_label.setText(
-            f'Button: {int.from_bytes(self.controller.controller_state_data[6:-1], "big"):016b}')
-        self.raw_data_label.setText(
-            f'Data: {int.from_bytes(self.controller.controller_state_data[:], "big"):018x}')
-        
+        state = self.controller.get_controller_state_snapshot()
+        if state == self.last_state:
+            return
+        self.last_state = state
+        # Decoded with the controller's schema, fields the schema does not have are shown as '-'
+        schema = self.controller.schema
+        values = schema.decode(state)
+        for name, label in self.value_labels.items():
+            self.set_label_text(label, f'{values.get(name, "-")}')
+        buttons = schema.get_field('buttons')
+        if buttons is not None:
+            self.set_label_text(self.button_state_label, f'Button: {values["buttons"]:0{buttons.bits}b}')
+        self.set_label_text(self.raw_data_label, f'Data: {state.hex()}')
 
-    def update(self):
-        self.controller.tick()
+    def display_loop_stats(self):
+        text = self.tick_loop.get_stats_text()
+        dropped = self.controller.get_send_stats()['frames_dropped']
+        if dropped:
+            text += f', dropped {dropped}'
+        if text != self.statusbar.currentMessage():
+            self.statusbar.showMessage(text)
 
+    def display_link_load(self):
+        utilization = self.controller.get_link_utilization()
+        if utilization is None:
+            # Not connected, or a network transport without a fixed capacity
+            self.link_load_bar.setValue(0)
+            text = 'Link load: -'
+        else:
+            self.link_load_bar.setValue(min(100, round(utilization * 100)))
+            text = f'Link load %p% (max {self.controller.get_max_send_rate():.0f} Hz)'
+        if text != self.link_load_bar.format():
+            self.link_load_bar.setFormat(text)
+
+    def set_display_rate(self, rate):
+        self.display_rate = rate
+        if not self.is_idle:
+            self.timer.setInterval(max(1, round(1000 / rate)))
+
+    def set_idle(self, is_idle):
+        self.is_idle = is_idle
+        rate = MainWindow.IDLE_DISPLAY_RATE if is_idle else self.display_rate
+        self.timer.setInterval(max(1, round(1000 / rate)))
+        if not is_idle:
+            self.update()   # Show the gamepad or port that ended the idle state straight away
+
+    def update(self):
+        # Nothing to draw while minimized
+        if self.isMinimized():
+            return
         self.set_uart_connect_text()
         self.set_controller_connect_text()
         self.display_controller_state()
+        self.display_loop_stats()
+        if self.plot_panel is not None:
+            self.plot_panel.update_plot()
+
+    def closeEvent(self, event):
+        self.tick_loop.stop()
+        self.setting_window.close()
+        super().closeEvent(event)
@@ -0,0 +1,155 @@
+import functools
+import signal
+import sys
+import time
+
+from .protocol import XorProtocol, make_protocol
+from .recording import RecordingError, Replayer
+from .transport import WRITE_ALL_TIMEOUT, TransportError, make_transport, write_all
+
+
+def get_status_line(controller, tick_loop):
+    stats = tick_loop.get_stats()
+    send_stats = controller.get_send_stats()
+    errors = f', {stats["tick_errors"]} tick errors' if stats['tick_errors'] else ''
+    return (f'{time.strftime("%H:%M:%S")} '
+            f'{controller.get_connection_status()} ({controller.port or "-"} @ {controller.baudrate}), '
+            f'Controller: {get_gamepad_status(controller)}, '
+            f'{stats["rate"]:.1f}/{stats["target_rate"]} Hz{" (idle)" if controller.idle else ""}, jitter {stats["jitter_mean"]:.2f} ms '
+            f'(max {stats["jitter_max"]:.2f}){errors}, sent {send_stats["frames_sent"]}, '
+            f'suppressed {send_stats["frames_suppressed"]}, dropped {send_stats["frames_dropped"]}, '
+            f'data {controller.get_controller_state_snapshot().hex()}'
+            + get_link_budget_text(controller))
+
+
+def get_link_budget_text(controller):
+    utilization = controller.get_link_utilization()
+    if utilization is None:
+        return ''
+    return (f', link {utilization:.0%} (max {controller.get_max_send_rate():.0f} Hz, '
+            f'throttled {controller.get_send_stats()["frames_throttled"]})')
+
+
+def get_gamepad_status(controller):
+    gamepads = controller.all_gamepads
+    if len(gamepads) == 1:
+        return 'Connected' if controller.is_joystick_connected() else 'Disconnected'
+    return f'{sum(gamepad.is_connected() for gamepad in gamepads)}/{len(gamepads)} connected'
+
+
+def get_link_line(controller):
+    return '  links: ' + ', '.join(
+        f'{stats["port"]} {"up" if stats["connected"] else "down"} {stats["rate"]:.0f}/s '
+        f'(replaced {stats["frames_replaced"]}, dropped {stats["frames_dropped"]})'
+        for stats in controller.get_link_stats())
+
+
+def get_telemetry_line(controller):
+    stats = controller.telemetry.get_stats()
+    if stats is None:
+        return None
+    rtt = (f'rtt us p50/p99/max {stats["rtt_p50"]}/{stats["rtt_p99"]}/{stats["rtt_max"]}, ' if stats['rtt_count']
+           else '')
+    return (f'  telemetry: {rtt}battery {stats["battery"]} mV, mode {stats["mode"]}, '
+            f'{stats["frames"]} frames ({stats["bad_frames"]} bad)')
+
+
+def get_latency_line(controller):
+    stats = controller.get_latency_stats()
+    return '  latency us (p50/p99/max): ' + ', '.join(
+        f'{stage} {summary["p50"]}/{summary["p99"]}/{summary["max"]}'
+        for stage, summary in stats.items() if summary['count'])
+
+
+def run_headless(controller, tick_loop, status_interval=1.0):
+    """
+    Runs the controller without a GUI until interrupted (Ctrl+C or SIGTERM), printing a status line every
+    status_interval seconds. Either way the recording, shared state and links are closed before returning.
+
+    :return: process exit code
+    """
+    # Takes over from SDL's handler, which would only queue a pygame.QUIT for Controller.process_events
+    signal.signal(signal.SIGTERM, lambda signum, frame: controller.quit_requested.set())
+    try:
+        while tick_loop.is_running() and not controller.quit_requested.wait(status_interval):
+            print(get_status_line(controller, tick_loop), flush=True)
+            if controller.links:
+                print(get_link_line(controller), flush=True)
+            telemetry_line = get_telemetry_line(controller)
+            if telemetry_line is not None:
+                print(telemetry_line, flush=True)
+            if controller.latency_stats is not None:
+                print(get_latency_line(controller), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tick_loop.stop()
+        controller.telemetry.stop()
+        with controller.lock:
+            controller.stop_recording()
+            controller.stop_publishing()
+            controller.serial_disconnect()
+        controller.stop_links()
+    return 0
+
+
+def replay_to_port(path, port, baudrate, speed=1.0, loop=False, protocol_version=XorProtocol.VERSION):
+    """
+    Streams a recording to a port (serial or network, see make_transport), see Replayer.replay. Recordings hold
+    frames in the version 1 layout, which are written as is when they carry a valid checksum and re-encoded
+    otherwise. Frames are written with write_all, so they are paced by the link rather than dropped when they
+    outpace it. A recording or port that cannot be opened, or a port lost during the replay, is reported in one
+    line on stderr.
+
+    :return: process exit code
+    """
+    try:
+        replayer = Replayer(path)
+    except (OSError, RecordingError) as e:
+        print(f'Cannot replay {path}: {e}', file=sys.stderr)
+        return 1
+    try:
+        transport = make_transport(port, baudrate)
+        transport.open()
+    except TransportError as e:
+        replayer.close()
+        print(f'Cannot open {port}: {e}', file=sys.stderr)
+        return 1
+
+    write = functools.partial(write_all, transport)
+    if protocol_version != XorProtocol.VERSION or not replayer.checksum_size:
+        frame = bytearray(replayer.frame_size)
+        protocol = make_protocol(frame, protocol_version)
+        sequence = 0
+
+        def write_reencoded(recorded_frame):
+            nonlocal sequence
+            frame[:] = recorded_frame
+            protocol.update()
+            write_all(transport, protocol.encode(sequence))
+            sequence = (sequence + 1) & 0xFF
+        write = write_reencoded
+    print(f'Replaying {replayer.num_frames} frames ({replayer.duration():.1f} s) to {port} at '
+          f'{"max speed" if speed <= 0 else f"{speed:g}x"}', flush=True)
+    try:
+        while True:
+            start = time.perf_counter()
+            dropped = transport.frames_dropped
+            frames = replayer.replay(write, speed)
+            transport.drain(WRITE_ALL_TIMEOUT)
+            elapsed = time.perf_counter() - start
+            dropped = transport.frames_dropped - dropped
+            sent = frames - dropped
+            print(f'{sent} frames in {elapsed:.2f} s ({sent / max(elapsed, 1e-9):.0f} frames/s), '
+                  f'{dropped} dropped', flush=True)
+            if not loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    except TransportError as e:
+        print(f'Replay to {port} stopped: {e}', file=sys.stderr)
+        return 1
+    finally:
+        transport.close()
+        replayer.close()
+    return 0
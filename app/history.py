@@ -0,0 +1,43 @@
+from array import array
+
+
+class FrameHistory:
+    """
+    The last `capacity` frames with their time.monotonic() timestamps, in arrays allocated once.
+
+    record() runs on the TickLoop thread and only copies the frame into its slot, so memory stays constant whatever
+    the rate. Readers on other threads never block it: the write count is bumped after each write, and read()
+    drops any entry the writer may have overwritten while it was being copied.
+    """
+
+    def __init__(self, frame_size, capacity):
+        self.frame_size = frame_size
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.frames = bytearray(frame_size * capacity)
+        self.count = 0  # Frames recorded so far, the next one goes to slot count % capacity
+
+    def record(self, frame, timestamp):
+        slot = self.count % self.capacity
+        start = slot * self.frame_size
+        self.frames[start:start + self.frame_size] = frame
+        self.times[slot] = timestamp
+        self.count += 1
+
+    def read(self, since=0):
+        """
+        :param since: count returned by the previous read, 0 for everything still in the buffer
+        :return: (count, entries), entries being the (timestamp, frame) recorded since then, oldest first
+        """
+        count, capacity, frame_size = self.count, self.capacity, self.frame_size
+        # The slot after the newest entry may be mid-write, so one fewer than capacity entries are readable
+        first = max(since, count - capacity + 1)
+        entries = []
+        for n in range(first, count):
+            slot = n % capacity
+            start = slot * frame_size
+            entries.append((self.times[slot], bytes(self.frames[start:start + frame_size])))
+        overwritten = self.count - capacity + 1 - first
+        if overwritten > 0:
+            del entries[:overwritten]
+        return count, entries
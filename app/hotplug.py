@@ -0,0 +1,120 @@
+import threading
+import time
+from enum import Enum
+
+from .transport import TransportError, make_transport
+
+
+class PortWatcher:
+    """
+    Enumerates serial ports on a background thread and reconnects the Controller to its remembered port (a serial
+    device once it is listed, or a network address straight away).
+
+    comports() is a full sysfs/udev (or SetupAPI) scan, so it never runs on the tick thread. The result is cached
+    in self.ports, and reconnect attempts back off exponentially while the port keeps failing to open.
+    """
+    SCAN_INTERVAL = 1.0     # s between port scans
+    MIN_BACKOFF = 0.1       # s before the first reconnect retry
+    MAX_BACKOFF = 5.0
+
+    class Event(Enum):
+        PORTS_CHANGED = 1   # data: list of port descriptions
+        RECONNECTED = 2     # data: port device name
+
+    def __init__(self, controller, scan_interval=SCAN_INTERVAL):
+        self.controller = controller
+        self.scan_interval = scan_interval
+        self.ports = []
+        self.backoff = PortWatcher.MIN_BACKOFF
+        self._listeners = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def add_listener(self, callback):
+        """
+        :param callback: called as callback(event, data) from the watcher thread. Qt code should forward it
+                         through a signal.
+        """
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='PortWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_scan(self):
+        """Rescan (and retry reconnecting) now instead of waiting for the next interval."""
+        self.backoff = PortWatcher.MIN_BACKOFF
+        self._wakeup.set()
+
+    def get_port_descriptions(self):
+        return [port.description for port in self.ports]
+
+    def _notify(self, event, data):
+        for callback in self._listeners:
+            callback(event, data)
+
+    def _run(self):
+        while self._running:
+            start = time.perf_counter_ns()
+            self.scan()
+            stats = self.controller.latency_stats
+            if stats is not None:
+                stats.record('port_scan', time.perf_counter_ns() - start)
+            timeout = self.scan_interval
+            if self.controller.should_auto_reconnect() and self.is_reconnect_possible(self.controller.port):
+                start = time.perf_counter_ns()
+                is_reconnected = self.try_reconnect()
+                if stats is not None:
+                    stats.record('reconnect', time.perf_counter_ns() - start)
+                if is_reconnected:
+                    self.backoff = PortWatcher.MIN_BACKOFF
+                else:
+                    timeout = min(timeout, self.backoff)
+                    self.backoff = min(self.backoff * 2, PortWatcher.MAX_BACKOFF)
+            else:
+                self.backoff = PortWatcher.MIN_BACKOFF
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def scan(self):
+        import serial.tools.list_ports  # Imported on first scan, it is not needed to send the first frame
+        ports = serial.tools.list_ports.comports()
+        changed = [port.device for port in ports] != [port.device for port in self.ports]
+        self.ports = ports
+        if changed:
+            self._notify(PortWatcher.Event.PORTS_CHANGED, self.get_port_descriptions())
+
+    def is_port_present(self, device):
+        return any(port.device == device for port in self.ports)
+
+    def is_reconnect_possible(self, port):
+        try:
+            transport = make_transport(port, self.controller.baudrate)
+        except TransportError:
+            return False
+        return not transport.needs_device or self.is_port_present(port)
+
+    def try_reconnect(self):
+        port, baudrate = self.controller.port, self.controller.baudrate
+        try:
+            # Opened outside the controller lock so the tick thread never waits on the driver or network
+            transport = make_transport(port, baudrate)
+            transport.open()
+        except TransportError:
+            return False
+        if not self.controller.attach_transport(transport, port, baudrate):
+            transport.close()
+            return False
+        self._notify(PortWatcher.Event.RECONNECTED, port)
+        return True
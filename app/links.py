@@ -0,0 +1,117 @@
+import threading
+import time
+
+from .transport import TransportError, make_transport
+
+
+class Link:
+    """
+    An extra output (serial or network, see make_transport) fed the same frames as the Controller's own port.
+
+    Each link has its own writer thread and a one-frame slot: submit() only replaces the slot, so a slow or stalled
+    link drops its oldest frames instead of delaying the tick or the other links. The writer reopens the transport
+    with exponential backoff while it is down.
+    """
+    MIN_BACKOFF = 0.1   # s before the first reconnect retry
+    MAX_BACKOFF = 5.0
+
+    def __init__(self, port, baudrate):
+        self.port = port
+        self.baudrate = baudrate
+        self.transport = None
+        self.frames_sent = 0
+        self.frames_replaced = 0    # Overwritten in the slot before the writer got to them
+        self.frames_dropped = 0     # Dropped by the transport or while disconnected
+        self.backoff = Link.MIN_BACKOFF
+        self._slot = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._rate_time = time.monotonic()
+        self._rate_frames = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'Link {self.port}', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def is_connected(self):
+        return self.transport is not None
+
+    def submit(self, frame):
+        """:param frame: bytes, shared between links and never modified"""
+        with self._condition:
+            if self._slot is not None:
+                self.frames_replaced += 1
+            self._slot = frame
+            self._condition.notify()
+
+    def get_stats(self):
+        """:return: counters plus frames/s written since the previous call"""
+        now = time.monotonic()
+        elapsed = now - self._rate_time
+        rate = (self.frames_sent - self._rate_frames) / elapsed if elapsed > 0 else 0.0
+        self._rate_time, self._rate_frames = now, self.frames_sent
+        return {
+            'port': self.port,
+            'connected': self.is_connected(),
+            'rate': rate,
+            'frames_sent': self.frames_sent,
+            'frames_replaced': self.frames_replaced,
+            'frames_dropped': self.frames_dropped + (self.transport.frames_dropped if self.transport else 0),
+        }
+
+    def _run(self):
+        while self._running:
+            if self.transport is None and not self._open():
+                # submit() notifies every tick, so wait out the backoff against a deadline rather than a wakeup
+                deadline = time.monotonic() + self.backoff
+                with self._condition:
+                    while self._running and (left := deadline - time.monotonic()) > 0:
+                        self._condition.wait(left)
+                self.backoff = min(self.backoff * 2, Link.MAX_BACKOFF)
+                continue
+
+            with self._condition:
+                while self._slot is None and self._running:
+                    self._condition.wait()
+                frame, self._slot = self._slot, None
+            if frame is None:
+                continue
+            try:
+                dropped = self.transport.frames_dropped
+                self.transport.write(frame)
+                if self.transport.frames_dropped == dropped:
+                    self.frames_sent += 1
+            except TransportError:
+                self.frames_dropped += self.transport.frames_dropped + 1
+                self.transport.close()
+                self.transport = None
+
+    def _open(self):
+        try:
+            transport = make_transport(self.port, self.baudrate)
+            transport.open()
+        except TransportError:
+            with self._condition:
+                # Frames that arrive while the link is down are stale by the time it is back
+                if self._slot is not None:
+                    self._slot = None
+                    self.frames_dropped += 1
+            return False
+        self.transport = transport
+        self.backoff = Link.MIN_BACKOFF
+        return True
@@ -0,0 +1,167 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class TickLoop:
+    """
+    Drives Controller.tick() at a fixed rate on its own thread, independent of the GUI event loop.
+
+    Deadlines are computed from a monotonic clock as start + n * period, so a late tick does not push every
+    following tick back (no accumulated drift). If the loop falls more than MAX_LAG_PERIODS behind, it resyncs
+    instead of bursting to catch up. An exception from tick() is printed and counted, and the loop carries on with
+    the next tick rather than silently stopping the send thread.
+
+    While the controller is idle (no gamepad, nothing to send to, see Controller.update_idle) it only ticks at
+    IDLE_RATE, waiting on Controller.wakeup so a port or link coming up is served at full rate from the next tick.
+    """
+    DEFAULT_RATE = 50       # Hz
+    MIN_RATE = 1
+    MAX_RATE = 1000
+    IDLE_RATE = 10      # Hz, how often an idle controller checks for a gamepad being plugged in
+    MAX_LAG_PERIODS = 5
+    STATS_WINDOW = 2.0      # seconds of tick history kept for rate/jitter statistics
+
+    def __init__(self, controller, rate=DEFAULT_RATE):
+        self.controller = controller
+        self.rate = 0
+        self.period = 0
+        self.set_rate(rate)
+
+        self._thread = None
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self._tick_times = deque()
+        self._lateness = deque()
+        self.overruns = 0
+        self.tick_errors = 0
+        self._last_error = None
+
+    def set_rate(self, rate):
+        self.rate = max(TickLoop.MIN_RATE, min(TickLoop.MAX_RATE, rate))
+        self.period = 1 / self.rate
+
+    def start(self):
+        """Starts the thread and waits until it has initialized SDL, see Controller.init_sdl."""
+        if self.is_running():
+            return
+        self._running = True
+        self._started = threading.Event()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run, name='TickLoop', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self.stop()
+            raise self._start_error
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        clock = time.monotonic
+        controller = self.controller
+        try:
+            with controller.lock:
+                controller.init_sdl()   # SDL events must be pumped on the thread that initialized it
+        except Exception as e:
+            self._start_error = e
+            return
+        finally:
+            self._started.set()
+        period = self.period
+        next_deadline = clock()
+        while self._running:
+            is_idle = controller.idle
+            target = 1 / TickLoop.IDLE_RATE if is_idle else self.period
+            if period != target:  # Rate changed from another thread, or the controller went idle or woke up
+                period = target
+                next_deadline = clock()
+
+            now = clock()
+            delay = next_deadline - now
+            if delay > 0:
+                if not is_idle:
+                    time.sleep(delay)
+                elif controller.wakeup.wait(delay):
+                    next_deadline = clock()     # Woken for a new output, tick now
+                now = clock()
+            controller.wakeup.clear()
+
+            try:
+                with controller.lock:
+                    controller.tick()
+            except Exception as e:
+                self._tick_failed(e)
+
+            self._record(now, now - next_deadline)
+
+            next_deadline += period
+            if clock() - next_deadline > period * TickLoop.MAX_LAG_PERIODS:
+                self.overruns += 1
+                next_deadline = clock()
+
+    def _tick_failed(self, error):
+        self.tick_errors += 1
+        # A persistent fault raises on every tick, only print it when it changes
+        key = (type(error), str(error))
+        if key != self._last_error:
+            self._last_error = key
+            traceback.print_exc()
+
+    def _record(self, tick_time, lateness):
+        with self._stats_lock:
+            self._tick_times.append(tick_time)
+            self._lateness.append(lateness)
+            horizon = tick_time - TickLoop.STATS_WINDOW
+            while self._tick_times[0] < horizon:
+                self._tick_times.popleft()
+                self._lateness.popleft()
+
+    def get_stats(self):
+        """
+        :return: dict with the achieved rate (Hz) and tick jitter (ms) over the last STATS_WINDOW seconds.
+                 Jitter is the lateness of each tick start relative to its scheduled deadline.
+        """
+        horizon = time.monotonic() - TickLoop.STATS_WINDOW
+        with self._stats_lock:
+            # Age out against the clock too, so a loop that stopped ticking reports 0 Hz instead of its last rate
+            while self._tick_times and self._tick_times[0] < horizon:
+                self._tick_times.popleft()
+                self._lateness.popleft()
+            tick_times = list(self._tick_times)
+            lateness = list(self._lateness)
+
+        stats = {
+            'target_rate': self.rate,
+            'rate': 0.0,
+            'jitter_mean': 0.0,
+            'jitter_max': 0.0,
+            'overruns': self.overruns,
+            'tick_errors': self.tick_errors,
+        }
+        if len(tick_times) >= 2:
+            stats['rate'] = (len(tick_times) - 1) / (tick_times[-1] - tick_times[0])
+        if lateness:
+            stats['jitter_mean'] = sum(lateness) / len(lateness) * 1000
+            stats['jitter_max'] = max(lateness) * 1000
+        return stats
+
+    def get_stats_text(self):
+        stats = self.get_stats()
+        if not self.is_running():
+            return 'Send: stopped'
+        if self.controller.idle:
+            return f'Idle: {stats["rate"]:.1f} Hz, waiting for a gamepad or a port'
+        text = (f'Send: {stats["rate"]:.1f}/{stats["target_rate"]} Hz, '
+                f'jitter {stats["jitter_mean"]:.2f} ms (max {stats["jitter_max"]:.2f})')
+        if stats['tick_errors']:
+            text += f', {stats["tick_errors"]} tick errors'
+        return text
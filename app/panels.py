@@ -0,0 +1,178 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QGridLayout, QGroupBox, QHBoxLayout, QLabel, QVBoxLayout
+
+from .app import Controller
+from .plot import SignalPlot
+from .stats import LatencyStats
+
+
+class LatencyPanel(QGroupBox):
+    """Shows p50/p99/max per tick stage. Instrumentation is only switched on while the box is checked."""
+    COLUMNS = ('p50', 'p99', 'max')
+
+    def __init__(self, controller: Controller, parent=None):
+        super().__init__('Latency (us)', parent)
+        self.controller = controller
+        self.setCheckable(True)
+        self.setChecked(False)
+        self.toggled.connect(self.latency_stats_toggled)
+
+        layout = QGridLayout(self)
+        layout.setVerticalSpacing(0)
+        self.value_labels = {}
+        for column, name in enumerate(LatencyPanel.COLUMNS, 1):
+            layout.addWidget(self.make_label(name), 0, column)
+        for row, stage in enumerate(LatencyStats.STAGES, 1):
+            label = QLabel(f'{stage}:')
+            label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            layout.addWidget(label, row, 0)
+            for column, name in enumerate(LatencyPanel.COLUMNS, 1):
+                self.value_labels[stage, name] = self.make_label('-')
+                layout.addWidget(self.value_labels[stage, name], row, column)
+        self.set_rows_visible(False)
+
+    @staticmethod
+    def make_label(text):
+        label = QLabel(text)
+        label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return label
+
+    def set_rows_visible(self, is_visible):
+        for index in range(self.layout().count()):
+            self.layout().itemAt(index).widget().setVisible(is_visible)
+
+    def latency_stats_toggled(self, is_checked):
+        self.controller.set_latency_stats_enabled(is_checked)
+        self.set_rows_visible(is_checked)
+        window = self.window()
+        window.resize(window.width(), window.sizeHint().height())
+
+    def update_stats(self):
+        stats = self.controller.get_latency_stats()
+        if stats is None:
+            return
+        for stage, summary in stats.items():
+            for name in LatencyPanel.COLUMNS:
+                self.value_labels[stage, name].setText(f'{summary[name]}' if summary['count'] else '-')
+
+
+class LinksPanel(QGroupBox):
+    """Connection status and throughput of each fan-out link (Controller.links): the port, then a row of values."""
+    COLUMNS = ('status', 'frames/s', 'replaced', 'dropped')
+
+    def __init__(self, controller: Controller, parent=None):
+        super().__init__('Links', parent)
+        self.controller = controller
+        self.rendered = {}
+
+        layout = QGridLayout(self)
+        layout.setVerticalSpacing(0)
+        self.value_labels = {}
+        for column, name in enumerate(LinksPanel.COLUMNS):
+            layout.addWidget(LatencyPanel.make_label(name), 0, column)
+        for index, link in enumerate(controller.links):
+            row = 1 + 2 * index
+            port_label = QLabel(link.port)
+            port_label.setToolTip(link.port)
+            layout.addWidget(port_label, row, 0, 1, len(LinksPanel.COLUMNS))
+            for column, name in enumerate(LinksPanel.COLUMNS):
+                self.value_labels[link, name] = LatencyPanel.make_label('-')
+                layout.addWidget(self.value_labels[link, name], row + 1, column)
+
+    def update_stats(self):
+        for link, stats in zip(self.controller.links, self.controller.get_link_stats()):
+            texts = {
+                'status': 'Connected' if stats['connected'] else 'Down',
+                'frames/s': f'{stats["rate"]:.0f}',
+                'replaced': f'{stats["frames_replaced"]}',
+                'dropped': f'{stats["frames_dropped"]}',
+            }
+            for name, text in texts.items():
+                label = self.value_labels.get((link, name))
+                if label is not None and self.rendered.get(label) != text:
+                    label.setText(text)
+                    self.rendered[label] = text
+
+
+class TelemetryPanel(QGroupBox):
+    """Round-trip times and the latest robot-to-host frame, see TelemetryReader."""
+    RTT_COLUMNS = ('p50', 'p99', 'max')
+    ROWS = ('battery', 'mode', 'frames')
+
+    def __init__(self, controller: Controller, parent=None):
+        super().__init__('Telemetry', parent)
+        self.controller = controller
+        self.rendered = {}
+
+        layout = QGridLayout(self)
+        layout.setVerticalSpacing(0)
+        self.value_labels = {}
+        for column, name in enumerate(TelemetryPanel.RTT_COLUMNS, 1):
+            layout.addWidget(LatencyPanel.make_label(name), 0, column)
+        layout.addWidget(LatencyPanel.make_label('rtt (ms):'), 1, 0)
+        for column, name in enumerate(TelemetryPanel.RTT_COLUMNS, 1):
+            self.value_labels[name] = LatencyPanel.make_label('-')
+            layout.addWidget(self.value_labels[name], 1, column)
+        for row, name in enumerate(TelemetryPanel.ROWS, 2):
+            layout.addWidget(LatencyPanel.make_label(f'{name}:'), row, 0)
+            self.value_labels[name] = LatencyPanel.make_label('-')
+            layout.addWidget(self.value_labels[name], row, 1, 1, len(TelemetryPanel.RTT_COLUMNS))
+
+    def update_stats(self):
+        stats = self.controller.telemetry.get_stats()
+        if stats is None:
+            return
+        texts = {
+            'battery': f'{stats["battery"] / 1000:.2f} V',
+            'mode': f'{stats["mode"]}',
+            'frames': f'{stats["frames"]} ({stats["bad_frames"]} bad)',
+        }
+        for name in TelemetryPanel.RTT_COLUMNS:
+            value = stats[f'rtt_{name}']
+            texts[name] = f'{value / 1000:.2f}' if value is not None else '-'
+        for name, text in texts.items():
+            label = self.value_labels[name]
+            if self.rendered.get(label) != text:
+                label.setText(text)
+                self.rendered[label] = text
+
+
+class PlotPanel(QGroupBox):
+    """Legend and SignalPlot of the axis fields. The plot only reads the history while the box is checked."""
+
+    def __init__(self, controller: Controller, parent=None):
+        super().__init__('Plot', parent)
+        self.setCheckable(True)
+        self.setChecked(False)
+        self.toggled.connect(self.plot_toggled)
+
+        layout = QVBoxLayout(self)
+        legend = QHBoxLayout()
+        self.plot = SignalPlot(controller)
+        for name, pen in zip(self.plot.names, self.plot.pens):
+            label = QLabel(name)
+            label.setStyleSheet(f'color: {pen.color().name()}')
+            legend.addWidget(label)
+        legend.addStretch()
+        layout.addLayout(legend)
+        layout.addWidget(self.plot)
+        self.legend = legend
+        self.set_plot_visible(False)
+
+    def set_plot_visible(self, is_visible):
+        for index in range(self.legend.count()):
+            widget = self.legend.itemAt(index).widget()
+            if widget is not None:
+                widget.setVisible(is_visible)
+        self.plot.setVisible(is_visible)
+
+    def plot_toggled(self, is_checked):
+        if is_checked:
+            self.plot.reset()   # Redraw from the history rather than bridging the time the box was unchecked
+        self.set_plot_visible(is_checked)
+        window = self.window()
+        window.resize(window.width(), window.sizeHint().height())
+
+    def update_plot(self):
+        if self.isChecked():
+            self.plot.update_plot()
@@ -0,0 +1,103 @@
+from PyQt6.QtCore import QLineF
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from .app import Controller
+
+COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f')
+
+
+class SignalPlot(QWidget):
+    """
+    Scrolling plot of the first gamepad's axis fields over the last `seconds`, read from Controller.history.
+
+    The plot is kept in a pixmap that is only ever extended: each refresh scrolls it left by the columns that
+    passed, clears them and draws the segments up to the new samples, so the cost follows the samples added rather
+    than the size of the window. Consecutive samples in the same pixel are skipped, and a gap of more than GAP
+    between two ticks is left open, so stalls stay visible. A resize redraws everything from the history.
+    """
+    SECONDS = 5.0
+    GAP = 0.1   # s
+
+    def __init__(self, controller: Controller, seconds=SECONDS, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.seconds = seconds
+        schema = controller.schema
+        self.payload = slice(1, 1 + schema.size)
+        # (index in the decoded values, offset, scale) onto -1..1 per plotted field
+        self.signals = [(i, field.min_value, 2 / (field.max_value - field.min_value))
+                        for i, field in enumerate(schema.fields) if field.source == 'axis']
+        self.names = [field.name for field in schema.fields if field.source == 'axis']
+        self.pens = [QPen(QColor(COLORS[i % len(COLORS)])) for i in range(len(self.signals))]
+        self.setMinimumHeight(100)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.pixmap = None
+        self.reset()
+
+    def reset(self):
+        self.read_count = 0
+        self.last_column = None     # Column of the newest sample, at the right edge
+        self.last_time = None
+        self.last_points = [None] * len(self.signals)   # (column, y) per signal
+
+    def resizeEvent(self, event):
+        self.pixmap = QPixmap(self.size())
+        self.pixmap.fill(self.palette().base().color())
+        self.reset()
+        self.update_plot()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self.pixmap is not None:
+            QPainter(self).drawPixmap(0, 0, self.pixmap)
+
+    def update_plot(self):
+        if self.pixmap is None or not self.isVisible():
+            return
+        self.read_count, entries = self.controller.history.read(self.read_count)
+        if not entries:
+            return
+        width, height = self.pixmap.width(), self.pixmap.height()
+        column_time = self.seconds / width
+        newest_column = int(entries[-1][0] / column_time)
+        first_time = entries[-1][0] - self.seconds
+        if self.last_column is None or newest_column - self.last_column >= width:
+            self.pixmap.fill(self.palette().base().color())
+            shift = width
+        else:
+            shift = newest_column - self.last_column
+        self.last_column = newest_column
+
+        if shift:
+            self.pixmap.scroll(-shift, 0, self.pixmap.rect())
+        painter = QPainter(self.pixmap)
+        if shift:
+            # Clear the columns the scroll exposed and extend the zero line into them
+            painter.fillRect(width - shift, 0, shift, height, self.palette().base().color())
+            painter.setPen(QPen(self.palette().mid().color()))
+            painter.drawLine(width - shift, height // 2, width, height // 2)
+        lines = [[] for _ in self.signals]
+        decode, payload, signals = self.controller.schema.decode_values, self.payload, self.signals
+        last_points, last_time, half = self.last_points, self.last_time, (height - 1) / 2
+        for timestamp, frame in entries:
+            if timestamp < first_time:
+                continue
+            column = int(timestamp / column_time)
+            is_gap = last_time is None or timestamp - last_time > SignalPlot.GAP
+            values = decode(frame[payload])
+            for n, (index, offset, scale) in enumerate(signals):
+                y = round(half - ((values[index] - offset) * scale - 1) * half)
+                point = last_points[n]
+                if point is not None and not is_gap and point != (column, y):
+                    lines[n].append(QLineF(width - 1 - newest_column + point[0], point[1],
+                                           width - 1 - newest_column + column, y))
+                last_points[n] = (column, y)
+            last_time = timestamp
+        self.last_time = last_time
+        for pen, signal_lines in zip(self.pens, lines):
+            if signal_lines:
+                painter.setPen(pen)
+                painter.drawLines(signal_lines)
+        painter.end()
+        self.update()
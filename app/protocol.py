@@ -0,0 +1,106 @@
+from binascii import crc_hqx
+
+HEADER = 0x9C
+# SLIP (RFC 1055) special bytes
+SLIP_END = 0xC0
+SLIP_ESC = 0xDB
+SLIP_END_BYTES = bytes((SLIP_END,))
+SLIP_ESC_BYTES = bytes((SLIP_ESC,))
+SLIP_ESCAPED_END = bytes((SLIP_ESC, 0xDC))
+SLIP_ESCAPED_ESC = bytes((SLIP_ESC, 0xDD))
+# Every byte value as it appears in a SLIP frame, so the tail is escaped with lookups instead of replace()
+SLIP_ESCAPED_BYTES = [SLIP_ESCAPED_END if b == SLIP_END else SLIP_ESCAPED_ESC if b == SLIP_ESC else bytes((b,))
+                      for b in range(256)]
+
+
+def crc16(data, crc=0xFFFF):
+    # CRC-16/CCITT-FALSE (polynomial 0x1021, init 0xFFFF), binascii's table-driven implementation
+    return crc_hqx(data, crc)
+
+
+def slip_escape(data):
+    # ESC first, so the escapes inserted for END are not escaped again
+    return data.replace(SLIP_ESC_BYTES, SLIP_ESCAPED_ESC).replace(SLIP_END_BYTES, SLIP_ESCAPED_END)
+
+
+def slip_unescape(data):
+    # Reverse order of slip_escape: an ESC byte in escaped data always starts an escape sequence
+    return data.replace(SLIP_ESCAPED_END, SLIP_END_BYTES).replace(SLIP_ESCAPED_ESC, SLIP_ESC_BYTES)
+
+
+class XorProtocol:
+    """
+    Version 1: HEADER, payload, XOR of the payload bytes. The frame buffer is sent as is.
+
+    The frame is [HEADER][payload][check byte], the layout the Controller encodes into. update() runs when the
+    payload changed, encode() on every send and returns the bytes to write.
+    """
+    VERSION = 1
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.frame[0] = HEADER
+        self.payload = memoryview(frame)[1:-1]
+        self.wire_size = len(frame)
+
+    def update(self):
+        checksum = 0
+        for byte in self.payload:
+            checksum ^= byte
+        self.frame[-1] = checksum
+
+    def encode(self, sequence):
+        return self.frame
+
+
+class SlipProtocol(XorProtocol):
+    """
+    Version 2: SLIP_END, SLIP-escaped (payload, sequence number, CRC), SLIP_END.
+
+    SLIP_END never appears inside a frame, so a receiver resynchronizes on the next SLIP_END after noise or a
+    dropped byte instead of hunting for a header value that also occurs in the payload. The big-endian CRC-16
+    covers the payload and the sequence number, and the sequence number wraps at 256 so the receiver can count lost
+    frames. The version 1 check byte in the local frame is not maintained.
+
+    Escaping and the payload CRC are computed once per change in update(). encode() only extends the CRC over the
+    sequence number and appends the escaped tail from SLIP_ESCAPED_BYTES, all with C-level bytes operations. How
+    many tail bytes need escaping depends on the sequence number and CRC, so wire_size is the length of the frame
+    encode() last returned.
+    """
+    VERSION = 2
+    CRC_SIZE = 2
+
+    def __init__(self, frame):
+        super().__init__(frame)
+        self.sequence_bytes = [bytes((i,)) for i in range(256)]
+        self.frame[-1] = 0
+        self.payload_crc = 0
+        self.escaped_payload = b''
+        self.wire_size = 1 + len(self.payload) + 1 + SlipProtocol.CRC_SIZE + 1     # Before escaping
+
+    def update(self):
+        payload = self.frame[1:-1]  # A bytearray slice, cheaper than copying out of the memoryview
+        self.payload_crc = crc_hqx(payload, 0xFFFF)     # crc16() without the extra call
+        if SLIP_END in payload or SLIP_ESC in payload:
+            payload = slip_escape(payload)
+        self.escaped_payload = payload
+        self.wire_size = 1 + len(payload) + 1 + SlipProtocol.CRC_SIZE + 1     # Until encode() escapes the tail
+
+    def encode(self, sequence):
+        crc = crc_hqx(self.sequence_bytes[sequence], self.payload_crc)
+        escaped = SLIP_ESCAPED_BYTES
+        frame = b''.join((SLIP_END_BYTES, self.escaped_payload, escaped[sequence], escaped[crc >> 8],
+                          escaped[crc & 0xFF], SLIP_END_BYTES))
+        self.wire_size = len(frame)
+        return frame
+
+
+PROTOCOL_VERSIONS = (XorProtocol.VERSION, SlipProtocol.VERSION)
+
+
+def make_protocol(frame, version=XorProtocol.VERSION):
+    if version == XorProtocol.VERSION:
+        return XorProtocol(frame)
+    if version == SlipProtocol.VERSION:
+        return SlipProtocol(frame)
+    raise ValueError(f'unknown protocol version {version}, expected one of {PROTOCOL_VERSIONS}')
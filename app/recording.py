@@ -0,0 +1,132 @@
+import mmap
+import time
+from struct import Struct
+
+
+class RecordingError(Exception):
+    pass
+
+
+class Recorder:
+    """
+    Appends timestamped wire frames to a binary log.
+
+    Layout: a HEADER_SIZE byte header (see HEADER_STRUCT) followed by fixed-size records. Each record is a
+    float64 timestamp (seconds since recording started) followed by the frame, zero-padded to a multiple of 8 bytes
+    so a reader can view all timestamps as one strided float64 array without unpacking.
+    """
+    MAGIC = b'SCRC'
+    VERSION = 1
+    HEADER_SIZE = 32
+    # magic, version, header size, record size, frame size, frame offset in record, axes, button bytes,
+    # checksum bytes, frame header byte, start time (unix)
+    HEADER_STRUCT = Struct('<4sHHHHHBBBBd')
+    TIMESTAMP_STRUCT = Struct('<d')
+
+    def __init__(self, path, frame_size, num_axes, num_button_bytes, checksum_size, frame_header):
+        self.frame_size = frame_size
+        self.record_size = -(-(Recorder.TIMESTAMP_STRUCT.size + frame_size) // 8) * 8
+        self.record = bytearray(self.record_size)   # Reused for every frame
+        self.frames = 0
+        self.start_time = time.monotonic()
+
+        header = bytearray(Recorder.HEADER_SIZE)
+        Recorder.HEADER_STRUCT.pack_into(header, 0, Recorder.MAGIC, Recorder.VERSION, Recorder.HEADER_SIZE,
+                                         self.record_size, frame_size, Recorder.TIMESTAMP_STRUCT.size, num_axes,
+                                         num_button_bytes, checksum_size, frame_header, time.time())
+        self.file = open(path, 'wb')
+        self.file.write(header)
+
+    def record_frame(self, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        Recorder.TIMESTAMP_STRUCT.pack_into(self.record, 0, timestamp - self.start_time)
+        self.record[Recorder.TIMESTAMP_STRUCT.size:Recorder.TIMESTAMP_STRUCT.size + self.frame_size] = frame
+        self.file.write(self.record)
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+class Replayer:
+    """
+    Memory-maps a log written by Recorder and streams its frames.
+
+    Frames are handed out as slices of the mapping and timestamps are read through a float64 view of it, so replay
+    does not build per-frame bytes or tuples.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self.file.close()
+            raise RecordingError(f'{path} is empty')
+
+        if len(self.mm) < Recorder.HEADER_SIZE:
+            self.close()
+            raise RecordingError(f'{path} is too short to be a recording')
+        (magic, version, header_size, self.record_size, self.frame_size, self.frame_offset, self.num_axes,
+         self.num_button_bytes, self.checksum_size, self.frame_header, self.start_time) = \
+            Recorder.HEADER_STRUCT.unpack_from(self.mm, 0)
+        if magic != Recorder.MAGIC or version != Recorder.VERSION:
+            self.close()
+            raise RecordingError(f'{path} is not a version {Recorder.VERSION} recording')
+
+        # A recording cut short (e.g. by a crash) ends in a partial record, which is ignored
+        self.num_frames = (len(self.mm) - header_size) // self.record_size
+        self.view = memoryview(self.mm)[header_size:header_size + self.num_frames * self.record_size]
+        self.timestamps = self.view.cast('d')
+        self.timestamp_stride = self.record_size // 8
+
+    def get_timestamp(self, index):
+        return self.timestamps[index * self.timestamp_stride]
+
+    def get_frame(self, index):
+        offset = index * self.record_size + self.frame_offset
+        return self.view[offset:offset + self.frame_size]
+
+    def duration(self):
+        if self.num_frames == 0:
+            return 0.0
+        return self.get_timestamp(self.num_frames - 1) - self.get_timestamp(0)
+
+    def replay(self, write, speed=1.0, should_stop=None):
+        """
+        Writes every frame in order.
+
+        :param write: called with each frame (a memoryview, only valid during the call)
+        :param speed: playback speed relative to the recording, 0 writes as fast as possible
+        :param should_stop: optional callable checked between frames, replay ends when it returns True
+        :return: number of frames written
+        """
+        if self.num_frames == 0:
+            return 0
+        view, timestamps = self.view, self.timestamps
+        record_size, frame_size, stride = self.record_size, self.frame_size, self.timestamp_stride
+        clock, sleep = time.perf_counter, time.sleep
+        first_timestamp = timestamps[0]
+        start = clock()
+
+        offset = self.frame_offset
+        for index in range(self.num_frames):
+            if should_stop is not None and should_stop():
+                return index
+            if speed > 0:
+                delay = start + (timestamps[index * stride] - first_timestamp) / speed - clock()
+                if delay > 0:
+                    sleep(delay)
+            write(view[offset:offset + frame_size])
+            offset += record_size
+        return self.num_frames
+
+    def close(self):
+        # Views into the mapping must be released before it can be closed
+        for name in ('timestamps', 'view'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.mm.close()
+        self.file.close()
@@ -0,0 +1,341 @@
+import json
+import math
+from struct import Struct
+
+LUT_MIN_STEPS = 1024
+LUT_MAX_STEPS = 1 << 16     # SDL reports axes as 16-bit values
+SETTLED = 1e-4  # Smoothed axes snap to their input once this close
+
+
+class SchemaError(ValueError):
+    pass
+
+
+# Matches the original fixed layout: 6 axes (sticks signed, triggers unsigned), then 16 buttons, hat ignored
+DEFAULT_SCHEMA = {
+    'fields': [
+        {'name': 'lx', 'source': 'axis', 'index': 0},
+        {'name': 'ly', 'source': 'axis', 'index': 1},
+        {'name': 'rx', 'source': 'axis', 'index': 2},
+        {'name': 'ry', 'source': 'axis', 'index': 3},
+        {'name': 'l2', 'source': 'axis', 'index': 4, 'signed': False},
+        {'name': 'r2', 'source': 'axis', 'index': 5, 'signed': False},
+        {'name': 'buttons', 'source': 'buttons', 'index': 0, 'count': 16},
+    ],
+}
+
+
+class Field:
+    """
+    One value in the frame payload.
+
+    source 'axis': joystick axis `index`, scaled to `bits` (signed: -1..1 around zero, unsigned: -1..1 onto 0..max).
+                   Shaping, in order: `calibration` ([min, max] or [min, center, max] raw values mapped onto -1..1),
+                   `invert`, `deadzone` (around zero for signed fields, above rest for unsigned ones; with
+                   `radial` naming another signed axis field the two share a circular deadzone, rescaled so the
+                   output starts at zero on its edge), `expo` (0..1, blend of linear and cubic response).
+                   `smoothing` (0..1) low-pass filters the raw axis: each frame keeps that share of the last value.
+    source 'buttons': `count` buttons starting at `index`, one bit each, button `index` in the lowest bit
+    source 'hat': `component` 0 (x) or 1 (y) of hat `index`, -1/0/1
+    """
+    SOURCES = ('axis', 'buttons', 'hat')
+
+    def __init__(self, name, source, index=0, bits=None, signed=None, deadzone=None, count=1, component=0,
+                 invert=False, expo=0.0, calibration=None, smoothing=0.0, radial=None):
+        if source not in Field.SOURCES:
+            raise SchemaError(f'field {name!r}: unknown source {source!r}, expected one of {Field.SOURCES}')
+        if index < 0 or count < 1 or component not in (0, 1):
+            raise SchemaError(f'field {name!r}: invalid index, count or component')
+        if source != 'axis' and (invert or expo or calibration or smoothing or radial):
+            raise SchemaError(f'field {name!r}: shaping options only apply to axis fields')
+        if not 0 <= expo <= 1 or not 0 <= smoothing < 1:
+            raise SchemaError(f'field {name!r}: expo must be within 0..1 and smoothing within 0..1 (exclusive)')
+        if calibration is not None:
+            if len(calibration) == 2:
+                calibration = (calibration[0], (calibration[0] + calibration[1]) / 2, calibration[1])
+            if len(calibration) != 3 or not calibration[0] < calibration[1] < calibration[2]:
+                raise SchemaError(f'field {name!r}: calibration must be [min, max] or [min, center, max], increasing')
+        self.name = name
+        self.source = source
+        self.index = index
+        self.count = count
+        self.component = component
+        if source == 'buttons':
+            self.bits = count
+            self.signed = False
+        else:
+            self.bits = 8 if bits is None else bits
+            self.signed = True if signed is None else signed
+        if not 1 <= self.bits <= 64 or (self.signed and self.bits < 2):
+            raise SchemaError(f'field {name!r}: unsupported width of {self.bits} bits')
+        self.deadzone = deadzone
+        self.invert = invert
+        self.expo = expo
+        self.calibration = calibration
+        self.smoothing = smoothing
+        self.radial = radial    # Name of the field sharing the radial deadzone, set on both by FrameSchema
+        self.offset = 0     # Bit offset in the payload, set by FrameSchema
+
+    @property
+    def max_value(self):
+        return (1 << (self.bits - 1)) - 1 if self.signed else (1 << self.bits) - 1
+
+    @property
+    def min_value(self):
+        return -(1 << (self.bits - 1)) if self.signed else 0
+
+    @property
+    def lut_steps(self):
+        # Four table entries per output step, so quantizing the input costs at most one count
+        return min(LUT_MAX_STEPS, max(LUT_MIN_STEPS, 4 << self.bits))
+
+    def has_calibration(self):
+        return self.calibration is not None or self.invert
+
+    def has_shaping(self):
+        """:return: whether the axis needs more than a deadzone and scaling, i.e. a table"""
+        return self.has_calibration() or self.expo or self.radial is not None
+
+    def normalize(self, raw):
+        """Calibration and inversion: raw axis value onto -1..1"""
+        if self.calibration is not None:
+            low, center, high = self.calibration
+            raw = (raw - center) / (center - low) if raw < center else (raw - center) / (high - center)
+            raw = -1.0 if raw < -1.0 else 1.0 if raw > 1.0 else raw
+        return -raw if self.invert else raw
+
+    def shape(self, value):
+        """Deadzone (unless radial), expo curve and scaling: normalized value onto the field's integer range"""
+        deadzone = 0.0 if self.radial is not None else self.deadzone
+        if self.signed:
+            if -deadzone < value < deadzone:
+                value = 0.0
+            value = (1 - self.expo) * value + self.expo * value ** 3
+            value = int(value * self.max_value)
+        else:
+            travel = (value + 1) / 2
+            if travel < deadzone:
+                travel = 0.0
+            travel = (1 - self.expo) * travel + self.expo * travel ** 3
+            value = int(travel * 2 * (self.max_value // 2))
+        return self.min_value if value < self.min_value else self.max_value if value > self.max_value else value
+
+    def build_table(self, function):
+        """:return: function sampled at lut_steps + 1 evenly spaced points over -1..1"""
+        steps = self.lut_steps
+        return [function(-1 + 2 * i / steps) for i in range(steps + 1)]
+
+
+class FrameSchema:
+    """
+    Declarative frame payload layout, compiled once into an encoder and a decoder.
+
+    Fields are laid out in order as one little-endian bit stream: each field starts at the bit after the previous
+    one, so 8-bit fields are whole bytes and button bits fill bytes from the lowest bit up. When every field is a
+    byte-aligned 8/16/32/64 bit value the payload maps onto a precompiled struct format; otherwise fields are
+    combined into one integer and written with a single to_bytes. Either way encoding is one generated function
+    call with a single pack.
+    """
+    STRUCT_CODES = {8: 'b', 16: 'h', 32: 'i', 64: 'q'}
+
+    def __init__(self, fields, default_deadzone=0.0):
+        if not fields:
+            raise SchemaError('schema has no fields')
+        names = [field.name for field in fields]
+        if len(set(names)) != len(names):
+            raise SchemaError('field names must be unique')
+
+        self.fields = fields
+        offset = 0
+        for field in fields:
+            if field.deadzone is None:
+                field.deadzone = default_deadzone if field.source == 'axis' and field.signed else 0.0
+            if not 0 <= field.deadzone < 1:
+                raise SchemaError(f'field {field.name!r}: deadzone must be within 0..1 (exclusive)')
+            field.offset = offset
+            offset += field.bits
+        by_name = dict(zip(names, fields))
+        for field in fields:
+            if field.radial is None:
+                continue
+            partner = by_name.get(field.radial)
+            is_signed_axis = partner is not None and partner.source == 'axis' and partner.signed
+            if not is_signed_axis or partner is field or not field.signed:
+                raise SchemaError(f'field {field.name!r}: radial must name another signed axis field')
+            if partner.radial not in (None, field.name):
+                raise SchemaError(f'field {partner.name!r}: already shares a radial deadzone with {partner.radial!r}')
+            partner.radial = field.name
+            partner.deadzone = field.deadzone
+        self.num_bits = offset
+        self.size = (offset + 7) // 8
+
+        self.num_axes = max((f.index + 1 for f in fields if f.source == 'axis'), default=0)
+        self.num_buttons = max((f.index + f.count for f in fields if f.source == 'buttons'), default=0)
+        self.num_hats = max((f.index + 1 for f in fields if f.source == 'hat'), default=0)
+
+        self.struct = self.compile_struct()
+        self.encode = self.compile_encoder()
+        self.smooth = self.compile_smoother()
+        self.decode_values = self.compile_decoder()
+
+    @classmethod
+    def from_dict(cls, config, default_deadzone=0.0):
+        try:
+            fields = [Field(**field) for field in config['fields']]
+        except (KeyError, TypeError) as e:
+            raise SchemaError(f'invalid schema: {e}')
+        return cls(fields, default_deadzone)
+
+    @classmethod
+    def load(cls, path, default_deadzone=0.0):
+        with open(path) as f:
+            return cls.from_dict(json.load(f), default_deadzone)
+
+    def initial_axes(self):
+        # Unsigned axes are triggers, which rest at -1
+        axes = [0.0] * self.num_axes
+        for field in self.fields:
+            if field.source == 'axis' and not field.signed:
+                axes[field.index] = -1.0
+        return axes
+
+    def compile_struct(self):
+        if any(f.bits not in FrameSchema.STRUCT_CODES or f.offset % 8 for f in self.fields):
+            return None
+        codes = [FrameSchema.STRUCT_CODES[f.bits] for f in self.fields]
+        return Struct('<' + ''.join(c if f.signed else c.upper() for c, f in zip(codes, self.fields)))
+
+    @staticmethod
+    def value_expression(field):
+        if field.source == 'buttons':
+            return ' | '.join(f'buttons[{field.index + k}] << {k}' for k in range(field.count))
+        return f'hats[{field.index}][{field.component}]'
+
+    @staticmethod
+    def lookup_lines(target, table, value, steps):
+        # Nearest entry of a table sampled over -1..1, input beyond that range reads the ends of the table
+        return [f'    k = int(({value} + 1.0) * {steps / 2!r} + 0.5)',
+                f'    {target} = {table}[0 if k < 0 else {steps} if k > {steps} else k]']
+
+    @staticmethod
+    def direct_lines(target, field):
+        # Deadzone and scaling without a table, the same arithmetic as Field.shape, so the output is exact
+        raw = f'axes[{field.index}]'
+        if field.signed:
+            if not field.deadzone:
+                return [f'    {target} = int({raw} * {field.max_value})']
+            return [f'    a = {raw}',
+                    f'    {target} = 0 if -{field.deadzone!r} < a < {field.deadzone!r} else int(a * {field.max_value})']
+        if not field.deadzone:
+            return [f'    {target} = int(({raw} + 1) * {field.max_value // 2})']
+        return [f'    a = ({raw} + 1) / 2',
+                f'    {target} = 0 if a < {field.deadzone!r} else int(a * {2 * (field.max_value // 2)})']
+
+    def compile_encoder(self):
+        """
+        Axis shaping is evaluated once per table entry here, so encoding an axis costs one table lookup whatever
+        its calibration, deadzone and curve. Only a radial deadzone needs arithmetic per frame, on the pair. Axes
+        with nothing but a deadzone skip the table, so their output matches the unshaped value exactly.
+        """
+        lines = ['def encode(buffer, offset, axes, buttons, hats):']
+        namespace = {'sqrt': math.sqrt}
+        indexes = {field.name: i for i, field in enumerate(self.fields)}
+        for i, field in enumerate(self.fields):
+            j = indexes[field.radial] if field.radial is not None else None
+            if j is None or j < i:
+                continue
+            # Radial deadzone of fields i and j: calibrated inputs first, then one scale for both
+            for k, var in ((i, 'x'), (j, 'y')):
+                axis = self.fields[k]
+                if axis.has_calibration():
+                    namespace[f'p{k}'] = axis.build_table(axis.normalize)
+                    lines += self.lookup_lines(var, f'p{k}', f'axes[{axis.index}]', axis.lut_steps)
+                else:
+                    lines.append(f'    {var} = axes[{axis.index}]')
+            deadzone = field.deadzone
+            lines += ['    m = x * x + y * y',
+                      f'    if m <= {deadzone * deadzone!r}:',
+                      f'        r{i} = r{j} = 0.0',
+                      '    else:',
+                      f'        s = (1.0 - {deadzone!r} / sqrt(m)) / {1 - deadzone!r}',
+                      f'        r{i} = x * s',
+                      f'        r{j} = y * s']
+        for i, field in enumerate(self.fields):
+            if field.source == 'axis':
+                if field.radial is not None:
+                    namespace[f't{i}'] = field.build_table(field.shape)
+                    lines += self.lookup_lines(f'v{i}', f't{i}', f'r{i}', field.lut_steps)
+                elif field.has_shaping():
+                    namespace[f't{i}'] = field.build_table(lambda raw, f=field: f.shape(f.normalize(raw)))
+                    lines += self.lookup_lines(f'v{i}', f't{i}', f'axes[{field.index}]', field.lut_steps)
+                else:
+                    lines += self.direct_lines(f'v{i}', field)
+                    lines.append(f'    v{i} = {field.min_value} if v{i} < {field.min_value} else '
+                                 f'{field.max_value} if v{i} > {field.max_value} else v{i}')
+                continue
+            lines.append(f'    v{i} = {self.value_expression(field)}')
+            if field.source == 'hat':
+                lines.append(f'    v{i} = {field.min_value} if v{i} < {field.min_value} else '
+                             f'{field.max_value} if v{i} > {field.max_value} else v{i}')
+        values = [f'v{i}' for i in range(len(self.fields))]
+        if self.struct is not None:
+            lines.append(f'    pack_into(buffer, offset, {", ".join(values)})')
+        else:
+            terms = [f'(v{i} & {(1 << f.bits) - 1}) << {f.offset}' for i, f in enumerate(self.fields)]
+            lines.append(f'    buffer[offset:offset + {self.size}] = ({" | ".join(terms)}).to_bytes({self.size}, "little")')
+        namespace['pack_into'] = self.struct.pack_into if self.struct is not None else None
+        exec('\n'.join(lines), namespace)
+        return namespace['encode']
+
+    def compile_smoother(self):
+        """
+        :return: None without smoothing, else smooth(axes, filtered), which moves each axis of filtered towards axes
+                 and returns True while some axis has not settled yet
+        """
+        weights = {}
+        for field in self.fields:
+            if field.source == 'axis' and weights.setdefault(field.index, field.smoothing) != field.smoothing:
+                raise SchemaError(f'axis {field.index}: the fields reading it have different smoothing')
+        if not any(weights.values()):
+            return None
+        lines = ['def smooth(axes, filtered):', '    settling = False']
+        for index, weight in sorted(weights.items()):
+            if not weight:
+                lines.append(f'    filtered[{index}] = axes[{index}]')
+                continue
+            lines += [f'    a = axes[{index}]',
+                      f'    d = a - filtered[{index}]',
+                      f'    if -{SETTLED!r} < d < {SETTLED!r}:',
+                      f'        filtered[{index}] = a',
+                      '    else:',
+                      f'        filtered[{index}] = a - {weight!r} * d',
+                      '        settling = True']
+        lines.append('    return settling')
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        return namespace['smooth']
+
+    def compile_decoder(self):
+        if self.struct is not None:
+            unpack_from = self.struct.unpack_from
+            return lambda payload: unpack_from(payload, 0)
+
+        fields = [(f.offset, (1 << f.bits) - 1, f.signed, 1 << (f.bits - 1)) for f in self.fields]
+
+        def decode_values(payload):
+            value = int.from_bytes(payload[:self.size], 'little')
+            result = []
+            for offset, mask, signed, sign_bit in fields:
+                field_value = (value >> offset) & mask
+                if signed and field_value & sign_bit:
+                    field_value -= mask + 1
+                result.append(field_value)
+            return tuple(result)
+        return decode_values
+
+    def decode(self, payload):
+        """:return: {field name: integer value} for an encoded payload"""
+        return dict(zip((f.name for f in self.fields), self.decode_values(payload)))
+
+    def get_field(self, name):
+        return next((f for f in self.fields if f.name == name), None)
@@ -10,6 +10,7 @@ class SettingWindow(QMainWindow, Ui_SettingWindow):
         super().__init__(parent)
         self.setupUi(self)
         self.controller = controller
+        self.port_group.setEditable(True)  # Also accepts udp://host:port and tcp://host:port
         self.close_btn.clicked.connect(self.close_btn_clicked)
         self.scan_btn.clicked.connect(self.scan_btn_clicked)
         self.auto_reconnect_check.stateChanged.connect(self.auto_reconnect_state_changed)
@@ -19,15 +20,20 @@ class SettingWindow(QMainWindow, Ui_SettingWindow):
         self.close()
     
     def scan_btn_clicked(self):
+        # The list is refreshed from the port watcher's ports_changed signal once the scan finishes
+        self.controller.refresh_ports()
         self.port_group_box_update()
     
     def auto_reconnect_state_changed(self):
         self.controller.set_serial_auto_reconnect(self.get_auto_reconnect())
     
     def port_group_box_update(self):
+        selected_port = self.get_selected_port()
         self.port_group.clear()
         for port in self.scan_available_ports():
             self.port_group.addItem(port)
+        if selected_port:
+            self.port_group.setCurrentText(selected_port)
     
     def scan_available_ports(self):
         return self.controller.get_available_ports()
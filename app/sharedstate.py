@@ -0,0 +1,193 @@
+import os
+import time
+from struct import Struct
+
+DEFAULT_NAME = 'robot_controller_state'
+
+
+class SharedStateError(Exception):
+    pass
+
+
+def attach_shared_memory(name):
+    """Opens an existing segment without registering it with this process's resource tracker, which would unlink
+    it when this process exits."""
+    from multiprocessing import resource_tracker, shared_memory
+    try:
+        return shared_memory.SharedMemory(name, track=False)    # Python 3.13+
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+def get_publisher_pid(buf):
+    """:return: the publisher's process ID from a segment in this layout, None for any other segment"""
+    if len(buf) < SharedStateLayout.FRAME_OFFSET:
+        return None
+    magic, version, _ = SharedStateLayout.HEADER_STRUCT.unpack_from(buf, 0)
+    if magic != SharedStateLayout.MAGIC or version != SharedStateLayout.VERSION:
+        return None
+    return SharedStateLayout.PID_STRUCT.unpack_from(buf, SharedStateLayout.PID_OFFSET)[0]
+
+
+def is_process_alive(pid):
+    if os.name == 'nt':
+        # os.kill would terminate it. Windows frees a segment with its last handle, so one that exists is in use.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass    # Exists, owned by another user
+    return True
+
+
+class SharedStateLayout:
+    """
+    Layout of the shared memory segment, all little-endian:
+
+    0   magic b'SCST', layout version (uint16), frame size (uint16)
+    8   seqlock counter (uint64): odd while the publisher is writing, bumped to the next even value when done
+    16  frame sequence number (uint64, counts published frames), publish time (float64, time.monotonic(), which
+        is system-wide so readers can compute the age of a frame)
+    32  process ID of the publisher (uint64), so another publisher only replaces the segment once it is gone
+    40  the frame, as Controller.frame (header, payload, check byte)
+    """
+    MAGIC = b'SCST'
+    VERSION = 2
+    HEADER_STRUCT = Struct('<4sHH')
+    COUNTER_STRUCT = Struct('<Q')
+    COUNTER_OFFSET = 8
+    STAMP_STRUCT = Struct('<Qd')
+    STAMP_OFFSET = 16
+    PID_STRUCT = Struct('<Q')
+    PID_OFFSET = 32
+    FRAME_OFFSET = 40
+
+    @staticmethod
+    def size(frame_size):
+        return SharedStateLayout.FRAME_OFFSET + frame_size
+
+
+class StatePublisher:
+    """
+    Publishes the latest frame to a named shared memory segment (seqlock protocol, see SharedStateLayout).
+
+    Any number of StateReader processes can follow it without sockets or locks, the publisher never waits on them.
+    A segment left behind by a publisher that crashed is replaced. A segment whose publisher is still running
+    raises SharedStateError instead of being taken over.
+    """
+
+    def __init__(self, frame_size, name=DEFAULT_NAME):
+        # Imported here so loading this module (e.g. for DEFAULT_NAME) stays cheap at startup
+        from multiprocessing import shared_memory
+        size = SharedStateLayout.size(frame_size)
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            existing = attach_shared_memory(name)     # Untracked, it may belong to a live publisher
+            try:
+                owner = get_publisher_pid(existing.buf)
+            finally:
+                existing.close()
+            if owner is None or is_process_alive(owner):
+                raise SharedStateError(f'shared state {name!r} is in use'
+                                       + (f' by process {owner}' if owner is not None else '')
+                                       + ', publish under another name')
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        self.name = name
+        self.frame_size = frame_size
+        self.buf = self.shm.buf
+        # Views created once, so publish() does not allocate
+        self.frame_view = self.buf[SharedStateLayout.FRAME_OFFSET:SharedStateLayout.FRAME_OFFSET + frame_size]
+        self.counter = 0
+        self.published = 0
+        SharedStateLayout.HEADER_STRUCT.pack_into(self.buf, 0, SharedStateLayout.MAGIC, SharedStateLayout.VERSION,
+                                                  frame_size)
+        SharedStateLayout.COUNTER_STRUCT.pack_into(self.buf, SharedStateLayout.COUNTER_OFFSET, 0)
+        SharedStateLayout.PID_STRUCT.pack_into(self.buf, SharedStateLayout.PID_OFFSET, os.getpid())
+
+    def publish(self, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        buf, counter_struct, offset = self.buf, SharedStateLayout.COUNTER_STRUCT, SharedStateLayout.COUNTER_OFFSET
+        self.published += 1
+        # Each pack_into/slice assignment is a separate C call, so the stores reach memory in program order on
+        # x86-64 and the seqlock holds; readers of a weakly ordered CPU should also check the frame's check byte
+        counter_struct.pack_into(buf, offset, self.counter + 1)
+        SharedStateLayout.STAMP_STRUCT.pack_into(buf, SharedStateLayout.STAMP_OFFSET, self.published, timestamp)
+        self.frame_view[:] = frame
+        self.counter += 2
+        counter_struct.pack_into(buf, offset, self.counter)
+
+    def close(self):
+        self.frame_view.release()
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class StateReader:
+    """
+    Follows a StatePublisher from any local process:
+
+        reader = StateReader()
+        sequence, timestamp, frame = reader.read()
+
+    read() copies the frame into a buffer owned by the reader (one memcpy, no allocation, no system call) and
+    retries if the publisher wrote meanwhile. The returned bytearray is reused by the next read().
+    """
+    MAX_WAIT = 1.0  # s a read waits for a publisher that is halfway through a write
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.frame_view = None
+        try:
+            self.shm = attach_shared_memory(name)
+        except FileNotFoundError:
+            raise SharedStateError(f'no shared state named {name!r}, is the controller publishing?')
+        self.buf = self.shm.buf
+        magic, version, frame_size = SharedStateLayout.HEADER_STRUCT.unpack_from(self.buf, 0)
+        if magic != SharedStateLayout.MAGIC or version != SharedStateLayout.VERSION:
+            self.close()
+            raise SharedStateError(f'{name!r} is not a version {SharedStateLayout.VERSION} shared state segment')
+        self.frame_size = frame_size
+        self.frame_view = self.buf[SharedStateLayout.FRAME_OFFSET:SharedStateLayout.FRAME_OFFSET + frame_size]
+        self.frame = bytearray(frame_size)
+        self.retries = 0    # Reads that overlapped a publish and were repeated
+
+    def read(self):
+        """:return: (sequence, timestamp, frame), sequence is 0 until the first frame was published"""
+        buf, frame = self.buf, self.frame
+        unpack_counter = SharedStateLayout.COUNTER_STRUCT.unpack_from
+        unpack_stamp = SharedStateLayout.STAMP_STRUCT.unpack_from
+        deadline = None
+        while True:
+            before, = unpack_counter(buf, SharedStateLayout.COUNTER_OFFSET)
+            if not before & 1:
+                sequence, timestamp = unpack_stamp(buf, SharedStateLayout.STAMP_OFFSET)
+                frame[:] = self.frame_view
+                after, = unpack_counter(buf, SharedStateLayout.COUNTER_OFFSET)
+                if after == before:
+                    return sequence, timestamp, frame
+            self.retries += 1
+            if deadline is None:
+                deadline = time.monotonic() + StateReader.MAX_WAIT
+            elif time.monotonic() > deadline:
+                raise SharedStateError('publisher did not finish its write, it may have crashed mid-write')
+            time.sleep(0)   # Lets a preempted publisher finish
+
+    def close(self):
+        if self.frame_view is not None:
+            self.frame_view.release()
+            self.frame_view = None
+        self.buf = None
+        self.shm.close()
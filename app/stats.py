@@ -0,0 +1,77 @@
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of durations in microseconds.
+
+    Buckets are log-spaced with 4 sub-buckets per power of two (under 19% relative error), so recording is a
+    little integer arithmetic and one list increment with no allocation, and memory stays constant.
+    """
+    NUM_BUCKETS = 128   # Covers up to ~2^33 us, anything slower lands in the last bucket
+
+    def __init__(self):
+        self.counts = [0] * LatencyHistogram.NUM_BUCKETS
+        self.count = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket_index(value):
+        if value < 4:
+            return max(0, value)
+        bits = value.bit_length()
+        return min((bits - 2) * 4 + ((value >> (bits - 3)) & 3), LatencyHistogram.NUM_BUCKETS - 1)
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        if index < 4:
+            return index
+        bits = index // 4 + 2
+        return ((5 + index % 4) << (bits - 3)) - 1
+
+    def record(self, value):
+        self.counts[LatencyHistogram.bucket_index(value)] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """:return: upper bound of the bucket holding the given fraction (0-1) of samples, 0 when empty."""
+        if self.count == 0:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(LatencyHistogram.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * LatencyHistogram.NUM_BUCKETS
+        self.count = 0
+        self.max = 0
+
+
+class LatencyStats:
+    """Per-stage latency histograms of the tick pipeline, keyed by stage name."""
+    STAGES = ('event_pump', 'sample', 'encode', 'store', 'write', 'tick', 'port_scan', 'reconnect')
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+
+    def record(self, stage, duration_ns):
+        self.histograms[stage].record(duration_ns // 1000)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def summary(self):
+        """:return: {stage: {'count', 'p50', 'p99', 'max'}} with durations in microseconds"""
+        return {
+            stage: {
+                'count': histogram.count,
+                'p50': histogram.percentile(0.50),
+                'p99': histogram.percentile(0.99),
+                'max': histogram.max,
+            }
+            for stage, histogram in self.histograms.items()
+        }
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from struct import Struct
+
+from .decoder import FrameDecoder
+from .protocol import XorProtocol
+from .transport import READ_TIMEOUT, TransportError
+
+TELEMETRY_HEADER = 0x9D
+TELEMETRY_FIELDS = ('sequence', 'battery', 'mode')
+TELEMETRY_STRUCT = Struct('<BHB')   # Echoed sequence number, battery in mV, robot mode
+
+
+def encode_telemetry(sequence, battery, mode):
+    """:return: one robot-to-host frame, what the robot firmware (or tools/fake_robot.py) sends back"""
+    payload = TELEMETRY_STRUCT.pack(sequence & 0xFF, battery, mode)
+    checksum = 0
+    for value in payload:
+        checksum ^= value
+    return bytes((TELEMETRY_HEADER,)) + payload + bytes((checksum,))
+
+
+class TelemetryDecoder(FrameDecoder):
+    """
+    Incremental decoder for robot-to-host frames: TELEMETRY_HEADER, TELEMETRY_STRUCT, then the XOR of the payload.
+    The same layout as a version 1 host frame, only with a fixed payload instead of a FrameSchema.
+    """
+
+    def __init__(self):
+        self.schema = None
+        self.set_layout(TELEMETRY_HEADER, TELEMETRY_FIELDS, TELEMETRY_STRUCT.size, TELEMETRY_STRUCT.format[1:])
+        self.reset()
+
+
+class TelemetryReader:
+    """
+    Reads robot-to-host frames from the Controller's port on its own thread.
+
+    Each frame echoes the sequence number of the last host frame the robot received. Controller.serial_send stamps
+    every sequence number in Controller.send_times, so the round-trip time is the receive time minus that stamp.
+    Only protocol version 2 puts sequence numbers on the wire, with version 1 telemetry is still recorded but has
+    no RTT. Sequence numbers wrap at 256, so an echo older than 256 frames would match a newer send; RTTs above
+    MAX_RTT are discarded.
+
+    Samples go into a ring buffer of the last HISTORY frames. The send path never waits on the reader: it only
+    writes its timestamp into a preallocated list.
+    """
+    HISTORY = 1000
+    MAX_RTT = 1.0   # s
+
+    def __init__(self, controller, history=HISTORY):
+        self.controller = controller
+        self.decoder = TelemetryDecoder()
+        self.samples = deque(maxlen=history)    # (receive time, sequence, battery, mode, RTT in s or None)
+        self.lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='TelemetryReader', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        transport, is_failed = None, False
+        while self._running:
+            current = self.controller.transport
+            if current is not transport:
+                transport, is_failed = current, False
+                self.decoder.reset()    # Counters are per connection
+            if transport is None or is_failed:
+                # Disconnected, or the read failed and the send path has not replaced the transport yet
+                time.sleep(READ_TIMEOUT)
+                continue
+            try:
+                data = transport.read()
+            except TransportError:
+                is_failed = True
+                continue
+            if data:
+                self.receive(data, time.monotonic())
+
+    def receive(self, data, receive_time):
+        frames = self.decoder.feed(data)
+        if not frames:
+            return
+        send_times = self.controller.send_times
+        has_sequence = self.controller.protocol.VERSION != XorProtocol.VERSION
+        samples = []
+        for sequence, battery, mode in frames:
+            rtt = receive_time - send_times[sequence] if has_sequence else None
+            if rtt is not None and not 0 <= rtt <= TelemetryReader.MAX_RTT:
+                rtt = None
+            samples.append((receive_time, sequence, battery, mode, rtt))
+        with self.lock:
+            self.samples.extend(samples)
+
+    def get_samples(self):
+        with self.lock:
+            return list(self.samples)
+
+    def get_stats(self):
+        """
+        :return: None before the first frame, else {'battery' (mV), 'mode', 'frames' and 'bad_frames' (this
+                 connection), 'rtt_count', 'rtt_p50', 'rtt_p99', 'rtt_max' (microseconds, over the ring buffer)}
+        """
+        samples = self.get_samples()
+        if not samples:
+            return None
+        rtts = sorted(sample[4] for sample in samples if sample[4] is not None)
+        _, _, battery, mode, _ = samples[-1]
+        stats = {
+            'battery': battery,
+            'mode': mode,
+            'frames': self.decoder.frames,
+            'bad_frames': self.decoder.bad_frames,
+            'rtt_count': len(rtts),
+            'rtt_p50': None,
+            'rtt_p99': None,
+            'rtt_max': None,
+        }
+        if rtts:
+            stats['rtt_p50'] = round(rtts[len(rtts) // 2] * 1e6)
+            stats['rtt_p99'] = round(rtts[min(len(rtts) - 1, int(len(rtts) * 0.99))] * 1e6)
+            stats['rtt_max'] = round(rtts[-1] * 1e6)
+        return stats
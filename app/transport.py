@@ -0,0 +1,263 @@
+import os
+import select
+import socket
+import time
+
+import serial
+
+
+READ_TIMEOUT = 0.1  # s a read() waits for data, so a reader thread notices when it should stop
+WRITE_ALL_TIMEOUT = 1.0     # s write_all() waits for the link to take the previous frame
+DRAIN_POLL = 0.0005     # s between out_waiting checks while a serial port drains
+
+
+class TransportError(Exception):
+    pass
+
+
+def read_socket(sock):
+    """:return: bytes received, None when nothing arrived within READ_TIMEOUT"""
+    # Waits with select, the socket itself is non-blocking for the send path
+    readable, _, _ = select.select([sock], [], [], READ_TIMEOUT)
+    if not readable:
+        return None
+    try:
+        return sock.recv(65536)
+    except BlockingIOError:
+        return None
+
+
+def write_all(transport, data, timeout=WRITE_ALL_TIMEOUT):
+    """
+    Blocking counterpart of transport.write() for streaming, e.g. replay: waits until the link has taken the
+    previous frame, so frames are paced by the link instead of dropped. A frame is only dropped (and counted in
+    transport.frames_dropped) when the link takes nothing for timeout seconds.
+    """
+    if transport.drain(timeout):
+        transport.write(data)
+    else:
+        transport.frames_dropped += 1
+
+
+class SerialTransport:
+    """
+    A serial port, e.g. COM3 or /dev/ttyUSB0.
+
+    Writes never block (write_timeout=0). While the driver still holds bytes of an earlier frame (out_waiting),
+    e.g. under flow control, a hung device or a rate above what the baud rate carries, the new frame is dropped
+    instead of queued behind it. The next tick's frame replaces it, so the robot is never more than about one frame
+    behind. A frame the driver only partly took is finished first, frames are never cut or interleaved.
+
+    Only reconnected once PortWatcher lists the device again.
+    """
+    needs_device = True
+
+    def __init__(self, port, baudrate):
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self.pending = b''  # Unsent tail of the last frame
+        self.frames_dropped = 0
+
+    def open(self):
+        try:
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=READ_TIMEOUT, write_timeout=0)
+        except (serial.SerialException, ValueError) as e:
+            raise TransportError(str(e))
+
+    def write_some(self, data):
+        """:return: number of bytes the driver took, without waiting for room"""
+        fd = getattr(self.ser, 'fd', None)
+        if fd is None:
+            return self.ser.write(data)
+        # On POSIX pyserial retries EAGAIN in a busy loop even with write_timeout=0, the fd itself is non-blocking
+        try:
+            return os.write(fd, data)
+        except BlockingIOError:
+            return 0
+
+    def write(self, data):
+        try:
+            if self.pending:
+                self.pending = self.pending[self.write_some(self.pending):]
+            if self.pending or self.ser.out_waiting:
+                self.frames_dropped += 1
+                return
+            sent = self.write_some(data)
+            if sent == 0:
+                self.frames_dropped += 1
+            elif sent < len(data):
+                self.pending = bytes(data[sent:])
+        except (serial.SerialException, OSError) as e:
+            raise TransportError(str(e))
+
+    def drain(self, timeout):
+        """:return: whether the driver has sent everything written so far within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                if self.pending:
+                    self.pending = self.pending[self.write_some(self.pending):]
+                if not self.pending and not self.ser.out_waiting:
+                    return True
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(DRAIN_POLL)
+        except (serial.SerialException, OSError) as e:
+            raise TransportError(str(e))
+
+    def read(self):
+        """:return: bytes received from the device, b'' when none arrived within READ_TIMEOUT"""
+        try:
+            return self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError, TypeError) as e:
+            # TypeError: pyserial reading from a port closed by another thread
+            raise TransportError(str(e))
+
+    def close(self):
+        self.ser.close()
+
+
+class UdpTransport:
+    """
+    One datagram per frame to host:port, e.g. udp://192.168.4.1:9000.
+
+    There is no connection to lose: open() only creates the socket, and a frame the socket cannot take right away
+    (full send buffer, or an ICMP error left by an earlier datagram while the receiver is down) is dropped rather
+    than queued, since the next frame supersedes it anyway.
+    """
+    needs_device = False
+
+    def __init__(self, host, port):
+        self.port = f'udp://{host}:{port}'
+        self.address = (host, port)
+        self.sock = None
+        self.frames_dropped = 0
+
+    def open(self):
+        try:
+            family, type, proto, _, address = socket.getaddrinfo(*self.address, type=socket.SOCK_DGRAM)[0]
+            self.sock = socket.socket(family, type, proto)
+            self.sock.setblocking(False)
+            self.sock.connect(address)
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def write(self, data):
+        try:
+            self.sock.send(data)
+        except (BlockingIOError, ConnectionRefusedError):
+            self.frames_dropped += 1
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def drain(self, timeout):
+        """:return: whether the socket has room for another datagram within timeout seconds"""
+        try:
+            _, writable, _ = select.select([], [self.sock], [], timeout)
+        except (OSError, ValueError) as e:
+            raise TransportError(str(e))
+        return bool(writable)
+
+    def read(self):
+        try:
+            return read_socket(self.sock) or b''
+        except ConnectionRefusedError:
+            return b''  # ICMP error left by an earlier datagram, see write()
+        except (OSError, ValueError) as e:
+            raise TransportError(str(e))
+
+    def close(self):
+        self.sock.close()
+
+
+class TcpTransport:
+    """
+    A TCP stream to host:port with Nagle's algorithm off (TCP_NODELAY), e.g. tcp://192.168.4.1:9000.
+
+    The socket is non-blocking, so a slow link never stalls the tick thread. When the send buffer is full the rest
+    of a partly sent frame is kept and sent first on the next write, and whole frames are dropped until it is out;
+    frames are never interleaved. A reset or closed connection raises TransportError so PortWatcher reconnects.
+    """
+    needs_device = False
+    CONNECT_TIMEOUT = 1.0   # s
+
+    def __init__(self, host, port):
+        self.port = f'tcp://{host}:{port}'
+        self.address = (host, port)
+        self.sock = None
+        self.pending = b''  # Unsent tail of the last frame
+        self.frames_dropped = 0
+
+    def open(self):
+        try:
+            self.sock = socket.create_connection(self.address, timeout=TcpTransport.CONNECT_TIMEOUT)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.setblocking(False)
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def write(self, data):
+        try:
+            if self.pending:
+                sent = self.sock.send(self.pending)
+                self.pending = self.pending[sent:]
+                if self.pending:
+                    self.frames_dropped += 1
+                    return
+            sent = self.sock.send(data)
+            if sent < len(data):
+                self.pending = bytes(data[sent:])
+        except BlockingIOError:
+            self.frames_dropped += 1
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def drain(self, timeout):
+        """:return: whether the rest of a partly sent frame went out within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        try:
+            while self.pending:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                _, writable, _ = select.select([], [self.sock], [], left)
+                if writable:
+                    try:
+                        self.pending = self.pending[self.sock.send(self.pending):]
+                    except BlockingIOError:
+                        pass
+        except (OSError, ValueError) as e:
+            raise TransportError(str(e))
+        return not self.pending
+
+    def read(self):
+        try:
+            data = read_socket(self.sock)
+        except (OSError, ValueError) as e:
+            raise TransportError(str(e))
+        if data == b'':
+            raise TransportError('connection closed by peer')
+        return data or b''
+
+    def close(self):
+        self.sock.close()
+
+
+NETWORK_TRANSPORTS = {'udp': UdpTransport, 'tcp': TcpTransport}
+
+
+def make_transport(port, baudrate):
+    """
+    :param port: serial device name, or udp://host:port / tcp://host:port
+    :param baudrate: only used by serial ports
+    """
+    scheme, separator, address = port.partition('://')
+    if not separator:
+        return SerialTransport(port, baudrate)
+    if scheme not in NETWORK_TRANSPORTS:
+        raise TransportError(f'unknown transport {scheme!r}, expected one of {tuple(NETWORK_TRANSPORTS)}')
+    host, _, number = address.rpartition(':')
+    if not host or not number.isdigit():
+        raise TransportError(f'expected {scheme}://host:port, got {port!r}')
+    return NETWORK_TRANSPORTS[scheme](host.strip('[]'), int(number))
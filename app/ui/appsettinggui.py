@@ -56,6 +56,11 @@ class Ui_SettingWindow(object):
         self.baudrate_group.setObjectName("baudrate_group")
         self.baudrate_group.addItem("")
         self.baudrate_group.addItem("")
+        self.baudrate_group.addItem("")
+        self.baudrate_group.addItem("")
+        self.baudrate_group.addItem("")
+        self.baudrate_group.addItem("")
+        self.baudrate_group.addItem("")
         self.gridLayout.addWidget(self.baudrate_group, 1, 1, 1, 2)
         self.auto_reconnect_check = QtWidgets.QCheckBox(parent=self.groupBox)
         self.auto_reconnect_check.setText("")
@@ -112,6 +117,11 @@ class Ui_SettingWindow(object):
         self.label_3.setText(_translate("SettingWindow", "Auto-reconnect:"))
         self.baudrate_group.setItemText(0, _translate("SettingWindow", "9600"))
         self.baudrate_group.setItemText(1, _translate("SettingWindow", "115200"))
+        self.baudrate_group.setItemText(2, _translate("SettingWindow", "230400"))
+        self.baudrate_group.setItemText(3, _translate("SettingWindow", "460800"))
+        self.baudrate_group.setItemText(4, _translate("SettingWindow", "500000"))
+        self.baudrate_group.setItemText(5, _translate("SettingWindow", "921600"))
+        self.baudrate_group.setItemText(6, _translate("SettingWindow", "1000000"))
         self.label.setText(_translate("SettingWindow", "Port:"))
         self.scan_btn.setText(_translate("SettingWindow", "scan serial ports"))
         self.close_btn.setText(_translate("SettingWindow", "close"))
@@ -0,0 +1,207 @@
+"""
+End-to-end benchmark of the Controller send loop without a gamepad or a robot.
+
+A scripted fake joystick feeds the Controller, the TickLoop drives it at the requested rate, and a pty pair stands
+in for the serial port. A receiver thread parses the frames arriving on the pty and times each input change until
+it shows up on the wire. Then the joystick is unplugged and the port closed, and the idle phase measures the
+process's CPU use with nothing attached (with and without the idle backoff, see Controller.update_idle) and how long
+a port that comes back takes to get its first frame. Runs headless (SDL_VIDEODRIVER=dummy), Linux/macOS only.
+From the repository root:
+
+    python tools/bench_controller.py [--rate HZ] [--duration S] [--input-mode polling|event] [--script sine|step|idle]
+                                     [--idle-duration S]
+"""
+import argparse
+import math
+import os
+import select
+import threading
+import time
+
+from benchlib import FakeJoystick, attach_joystick, open_pty
+from app.app import Controller, pygame
+from app.decoder import FrameDecoder
+from app.loop import TickLoop
+from app.stats import LatencyHistogram
+
+
+class InputScript(threading.Thread):
+    """
+    Moves the fake joystick. Axis 0 steps through distinct values that the receiver uses as markers for latency,
+    the other axes follow a sine wave with --script sine.
+    """
+    MARKERS = range(20, 121)    # Axis 0 bytes, clear of the deadzone and of Controller.HEADER
+
+    def __init__(self, joystick, script, change_rate, use_events):
+        super().__init__(name='InputScript', daemon=True)
+        self.joystick = joystick
+        self.script = script
+        self.period = 1 / change_rate
+        self.use_events = use_events
+        self.change_times = {}
+        self.running = True
+
+    def set_axis(self, axis, value):
+        if self.use_events:
+            pygame.event.post(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=self.joystick.instance_id,
+                                                 axis=axis, value=value))
+        else:
+            self.joystick.axes[axis] = value
+
+    def run(self):
+        if self.script == 'idle':
+            return
+        step = 0
+        start = time.perf_counter()
+        while self.running:
+            marker = InputScript.MARKERS[step % len(InputScript.MARKERS)]
+            self.change_times[marker] = time.perf_counter()
+            self.set_axis(0, (marker + 0.5) / 127)
+            if self.script == 'sine':
+                phase = (time.perf_counter() - start) * 2 * math.pi
+                for axis in range(1, 4):
+                    self.set_axis(axis, math.sin(phase + axis))
+            step += 1
+            time.sleep(self.period)
+
+
+class FrameReceiver(threading.Thread):
+    """Decodes the frames arriving on the pty master and times each axis 0 marker from InputScript."""
+
+    def __init__(self, fd, change_times, schema):
+        super().__init__(name='FrameReceiver', daemon=True)
+        self.fd = fd
+        self.decoder = FrameDecoder(schema)
+        self.change_times = change_times
+        self.latency = LatencyHistogram()
+        self.running = True
+
+    def run(self):
+        last_marker = None
+        while self.running:
+            readable, _, _ = select.select([self.fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError:  # Slave side not open
+                continue
+            now = time.perf_counter()
+            for values in self.decoder.feed(data):
+                marker = values[0]
+                if marker != last_marker and marker in self.change_times:
+                    self.latency.record(int((now - self.change_times[marker]) * 1e6))
+                last_marker = marker
+
+
+def measure_idle(controller, tick_loop, duration, is_backoff):
+    """:return: (share of one core the process used, tick rate) over duration with nothing attached"""
+    update_idle = controller.update_idle
+    if not is_backoff:
+        controller.set_idle(False)
+        controller.update_idle = lambda: None
+    tick_loop.start()
+    time.sleep(Controller.IDLE_DELAY + 0.5)     # Let it settle into the idle state
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(duration)
+    cpu_used, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    rate = tick_loop.get_stats()['rate']
+    tick_loop.stop()
+    controller.update_idle = update_idle
+    return cpu_used / wall, rate
+
+
+def measure_wake(controller, tick_loop, master, port, baudrate):
+    """:return: s from connecting the port of an idle controller until its first frame is readable on the pty"""
+    tick_loop.start()
+    while not controller.idle:
+        time.sleep(0.05)
+    time.sleep(0.05)    # Into the idle wait
+    start = time.perf_counter()
+    controller.serial_connect(port, baudrate)
+    readable, _, _ = select.select([master], [], [], 1.0)
+    elapsed = time.perf_counter() - start
+    tick_loop.stop()
+    return elapsed if readable else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=int, default=TickLoop.DEFAULT_RATE, help='send rate in Hz')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds to run')
+    parser.add_argument('--input-mode', choices=[m.name.lower() for m in Controller.InputMode], default='polling')
+    parser.add_argument('--script', choices=('step', 'sine', 'idle'), default='sine')
+    parser.add_argument('--change-rate', type=float, default=20.0, help='input changes per second')
+    parser.add_argument('--baudrate', type=int, default=Controller.DEFAULT_BAUDRATE)
+    parser.add_argument('--idle-duration', type=float, default=3.0, help='seconds of each idle measurement, 0 to skip')
+    args = parser.parse_args()
+
+    master, port = open_pty()
+    controller = Controller(Controller.Mode.DISABLED_AUTO_CONNECT, Controller.InputMode[args.input_mode.upper()])
+    joystick = attach_joystick(controller, FakeJoystick())
+    controller.serial_connect(port, args.baudrate)
+    if not controller.is_serial_connected():
+        raise SystemExit(f'could not open {port}')
+
+    # CPU time spent in tick() itself, measured on the tick thread
+    tick = controller.tick
+    tick_cpu_ns = 0
+
+    def timed_tick():
+        nonlocal tick_cpu_ns
+        start = time.thread_time_ns()
+        tick()
+        tick_cpu_ns += time.thread_time_ns() - start
+
+    controller.tick = timed_tick
+
+    script = InputScript(joystick, args.script, args.change_rate, controller.input_mode == Controller.InputMode.EVENT)
+    receiver = FrameReceiver(master, script.change_times, controller.schema)
+    tick_loop = TickLoop(controller, args.rate)
+
+    receiver.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    tick_loop.start()
+    script.start()
+    time.sleep(args.duration)
+    loop_stats = tick_loop.get_stats()
+    tick_loop.stop()
+    cpu_used, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    script.running = False
+    time.sleep(0.1)
+    receiver.running = False
+    receiver.join()
+
+    frames = max(1, controller.frames_sent)
+    print(f'config:    {args.input_mode} input, {args.script} script, {args.rate} Hz target, {args.duration:g} s')
+    print(f'loop:      {loop_stats["rate"]:.1f} Hz achieved, jitter mean {loop_stats["jitter_mean"]:.3f} ms, '
+          f'max {loop_stats["jitter_max"]:.3f} ms, {loop_stats["overruns"]} overruns')
+    decoder = receiver.decoder
+    print(f'wire:      {decoder.frames / wall:.1f} frames/s received, {decoder.bad_frames} bad frames, '
+          f'{controller.frames_sent} sent')
+    if receiver.latency.count:
+        print(f'latency:   input change to bytes on pty p50 {receiver.latency.percentile(0.5)} us, '
+              f'p99 {receiver.latency.percentile(0.99)} us, max {receiver.latency.max} us '
+              f'({receiver.latency.count} changes)')
+    print(f'cpu:       tick {tick_cpu_ns / 1000 / frames:.1f} us/frame, '
+          f'process {cpu_used * 1e6 / frames:.1f} us/frame, {cpu_used / wall * 100:.1f}% of one core')
+
+    if args.idle_duration <= 0:
+        return
+    controller.tick = tick
+    with controller.lock:
+        controller.detach_joystick(controller.gamepads[0])
+        controller.serial_disconnect()
+    controller.port_watcher.start()     # Part of the idle cost, it scans for ports every SCAN_INTERVAL
+    idle_cpu, idle_rate = measure_idle(controller, tick_loop, args.idle_duration, True)
+    busy_cpu, busy_rate = measure_idle(controller, tick_loop, args.idle_duration, False)
+    wake = measure_wake(controller, tick_loop, master, port, args.baudrate)
+    controller.port_watcher.stop()
+    print(f'idle:      {idle_cpu * 100:.2f}% of one core at {idle_rate:.1f} Hz with nothing attached, '
+          f'{busy_cpu * 100:.2f}% at {busy_rate:.1f} Hz without the idle backoff')
+    print(f'wake:      first frame {wake * 1000:.2f} ms after the port came up' if wake is not None
+          else 'wake:      no frame within 1 s of the port coming up')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Throughput of the receiver-side stream decoders in app/decoder.py, or a summary of a real serial capture.
+
+Without --capture, builds a synthetic stream of random frames and feeds it in chunks the size a serial reader
+would get, once as is and once with bits flipped at random (--noise, default one per 100 frames), so the cost of
+resyncing shows next to the clean rate. Run from the repository root:
+
+    python tools/bench_decoder.py [--frames N] [--protocol 1|2] [--chunk BYTES] [--noise FLIPS]
+    python tools/bench_decoder.py --capture capture.bin [--protocol 1|2] [--schema layout.json]
+"""
+import argparse
+import random
+import time
+
+from benchlib import FakeJoystick
+from app.decoder import FrameDecoder, SlipFrameDecoder
+from app.protocol import PROTOCOL_VERSIONS, SlipProtocol, make_protocol
+from app.schema import DEFAULT_SCHEMA, FrameSchema
+
+
+def make_stream(schema, protocol_version, frames):
+    frame = bytearray(1 + schema.size + 1)
+    protocol = make_protocol(frame, protocol_version)
+    joystick = FakeJoystick(num_axis=schema.num_axes, num_buttons=schema.num_buttons, num_hats=schema.num_hats)
+    stream = bytearray()
+    for n in range(frames):
+        joystick.axes = [random.uniform(-1, 1) for _ in joystick.axes]
+        joystick.buttons = [random.getrandbits(1) for _ in joystick.buttons]
+        schema.encode(frame, 1, joystick.axes, joystick.buttons, joystick.hats)
+        protocol.update()
+        stream += protocol.encode(n & 0xFF)
+    return stream
+
+
+def decode(decoder, stream, chunk):
+    start = time.perf_counter()
+    frames = 0
+    for offset in range(0, len(stream), chunk):
+        frames += len(decoder.feed(stream[offset:offset + chunk]))
+    return frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--protocol', type=int, choices=PROTOCOL_VERSIONS, default=PROTOCOL_VERSIONS[0])
+    parser.add_argument('--chunk', type=int, default=65536, help='bytes per feed() call')
+    parser.add_argument('--noise', type=int, help='bits flipped at random positions in the noisy stream')
+    parser.add_argument('--schema', metavar='PATH', help='JSON frame schema, see app/schema.py')
+    parser.add_argument('--capture', metavar='PATH', help='decode raw bytes captured from the serial line')
+    args = parser.parse_args()
+
+    schema = FrameSchema.load(args.schema) if args.schema else FrameSchema.from_dict(DEFAULT_SCHEMA)
+    if args.capture:
+        with open(args.capture, 'rb') as f:
+            report('capture', schema, args.protocol, f.read(), args.chunk)
+        return
+
+    stream = make_stream(schema, args.protocol, args.frames)
+    report('clean', schema, args.protocol, stream, args.chunk)
+    noise = args.frames // 100 if args.noise is None else args.noise
+    for _ in range(noise):
+        stream[random.randrange(len(stream))] ^= 1 << random.randrange(8)
+    report(f'noisy ({noise} flips)', schema, args.protocol, stream, args.chunk)
+
+
+def report(name, schema, protocol_version, stream, chunk):
+    if protocol_version == SlipProtocol.VERSION:
+        decoder = SlipFrameDecoder(schema)
+    else:
+        decoder = FrameDecoder(schema)
+    frames, elapsed = decode(decoder, bytes(stream), chunk)
+
+    print(f'{name}:')
+    print(f'  decoded:   {frames} frames from {len(stream) / 1e6:.2f} MB in {elapsed * 1000:.1f} ms')
+    print(f'  speed:     {len(stream) / elapsed / 1e6:.1f} MB/s, {frames / elapsed:,.0f} frames/s')
+    print(f'  errors:    {decoder.bad_frames} bad frames, {decoder.skipped_bytes} bytes skipped'
+          + (f', {decoder.lost_frames} frames lost' if hasattr(decoder, 'lost_frames') else ''))
+
+
+if __name__ == '__main__':
+    main()
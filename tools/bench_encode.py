@@ -0,0 +1,142 @@
+"""
+Microbenchmark for the per-frame encode + send path of Controller.
+
+Compares the original encoder (new header bytearray every frame, pack() per axis, two writes) with the current
+in-place frame buffer, then the cost of the check byte/framing per protocol version against the original XOR loop.
+Run from the repository root:
+
+    python tools/bench_encode.py [--frames N]
+"""
+import argparse
+import time
+from struct import pack
+
+from benchlib import FakeJoystick, FakeSerial, attach_joystick, transient_bytes
+from app.app import Controller, pygame
+
+
+class LegacyController(Controller):
+    """The encoder as it was before the preallocated frame buffer."""
+
+    def __init__(self):
+        super().__init__()
+        self.init_sdl()     # Pumped directly below, not through process_events
+        self.controller_state_data = bytearray(Controller.NUM_CONTROLLER_BYTES)
+
+    def update_controller_state(self):
+        pygame.event.get()  # The current implementation pumps events too
+        gamepad = self.gamepads[0]
+        for i in range(min(Controller.MAX_NUM_JOY_AXIS, gamepad.num_axis)):
+            raw_axis_value = gamepad.joystick.get_axis(i)
+            if i in (4, 5):
+                axis_value = int((raw_axis_value + 1) * 127)
+                axis_value = max(0, min(255, axis_value))
+                self.controller_state_data[i] = pack('B', axis_value)[0]
+            else:
+                if abs(raw_axis_value) < self.JOY_THRESHOLD:
+                    raw_axis_value = 0
+                axis_value = int(raw_axis_value * 127)
+                axis_value = max(-128, min(127, axis_value))
+                self.controller_state_data[i] = pack('b', axis_value)[0]
+
+        for i in range(min(Controller.MAX_NUM_BUTTONS, gamepad.num_buttons)):
+            if gamepad.joystick.get_button(i):
+                self.controller_state_data[Controller.MAX_NUM_JOY_AXIS + i // 8] |= 1 << (i % 8)
+            else:
+                self.controller_state_data[Controller.MAX_NUM_JOY_AXIS + i // 8] &= ~(1 << (i % 8))
+
+        checksum = 0x00
+        for i in range(Controller.NUM_CONTROLLER_BYTES - 1):
+            checksum ^= self.controller_state_data[i]
+        self.controller_state_data[-1] = checksum
+
+    def serial_send(self):
+        self.transport.write(bytearray([Controller.HEADER]))
+        self.transport.write(self.controller_state_data)
+
+
+def prepare(controller):
+    attach_joystick(controller, FakeJoystick())
+    controller.transport = FakeSerial()
+    return controller
+
+
+def run_frames(controller, frames):
+    joystick = controller.gamepads[0].joystick
+    for n in range(frames):
+        joystick.axes[n % 6] = (n % 200) / 100 - 1
+        joystick.buttons[n % 16] = n & 1
+        controller.update_controller_state()
+        controller.serial_send()
+
+
+def measure(name, controller, frames):
+    prepare(controller)
+    run_frames(controller, 1000)  # warm up
+
+    start = time.perf_counter()
+    run_frames(controller, frames)
+    elapsed = time.perf_counter() - start
+
+    writes_before = controller.transport.writes
+    run_frames(controller, 1)
+    writes_per_frame = controller.transport.writes - writes_before
+
+    # Peak traced memory above the steady state while encoding/sending one frame. Floats from the axis maths and
+    # loop iterators are unavoidable in CPython, so compare the two columns rather than expecting zero.
+    encode_bytes = transient_bytes(controller.update_controller_state)
+    send_bytes = transient_bytes(controller.serial_send)
+
+    print(f'{name:<8} {frames / elapsed:>10,.0f} frames/s  {elapsed / frames * 1e6:>6.2f} us/frame  '
+          f'{writes_per_frame} write(s)/frame  encode {encode_bytes:>4.0f} B  send {send_bytes:>4.0f} B transient')
+
+
+def legacy_checksum(frame):
+    checksum = 0x00
+    for i in range(1, len(frame) - 1):
+        checksum ^= frame[i]
+    frame[-1] = checksum
+
+
+def measure_framing(frames):
+    controller = prepare(Controller())
+    run_frames(controller, 1)
+    frame = controller.frame
+    clock = time.perf_counter
+
+    start = clock()
+    for _ in range(frames):
+        legacy_checksum(frame)
+    baseline = (clock() - start) / frames * 1e6
+    print(f'{"xor loop":<16} {baseline:>6.3f} us/changed frame  (original checksum)')
+
+    for name, version in (('v1 xor', 1), ('v2 slip+crc16', 2)):
+        controller.set_protocol(version)
+        protocol = controller.protocol
+        update, encode = protocol.update, protocol.encode
+        start = clock()
+        for n in range(frames):
+            update()
+            encode(n & 0xFF)
+        changed = (clock() - start) / frames * 1e6
+        start = clock()
+        for n in range(frames):
+            encode(n & 0xFF)
+        unchanged = (clock() - start) / frames * 1e6
+        print(f'{name:<16} {changed:>6.3f} us/changed frame  {unchanged:>6.3f} us/unchanged frame  '
+              f'{protocol.wire_size} bytes on the wire  ({changed / baseline:.2f}x xor loop)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200000)
+    args = parser.parse_args()
+
+    measure('before', LegacyController(), args.frames)
+    measure('after', Controller(), args.frames)
+    print()
+    measure_framing(args.frames)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Cost of the frame history (app/history.py) on the tick thread and on the plot's side.
+
+Records frames as the TickLoop does and reports the time and peak traced memory per record() (CPython's temporary
+int objects for the slot arithmetic, freed right away; the buffer itself never grows), then the cost of
+the reads the plot makes: one display refresh's worth of new frames at the capture rate, and the whole buffer
+after a resize. Run from the repository root:
+
+    python tools/bench_history.py [--frames N] [--rate HZ] [--display-rate HZ]
+"""
+import argparse
+import time
+
+from benchlib import transient_bytes
+from app.app import Controller
+from app.history import FrameHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=500000)
+    parser.add_argument('--rate', type=int, default=1000, help='capture rate the reads are sized for')
+    parser.add_argument('--display-rate', type=int, default=60)
+    args = parser.parse_args()
+
+    capacity = Controller.HISTORY_SECONDS * Controller.HISTORY_MAX_RATE
+    history = FrameHistory(Controller.FRAME_SIZE, capacity)
+    frame = bytearray(Controller.FRAME_SIZE)
+    clock = time.monotonic
+
+    start = time.perf_counter()
+    for n in range(args.frames):
+        frame[1] = n & 0xFF
+        history.record(frame, clock())
+    record = (time.perf_counter() - start) / args.frames
+    allocated = transient_bytes(lambda: history.record(frame, 0.0))
+    memory = history.times.itemsize * capacity + len(history.frames)
+    print(f'record:  {record * 1e6:.3f} us/frame, {allocated:.0f} B transient per frame, '
+          f'{memory / 1024:.0f} KiB for {capacity:,} frames')
+
+    per_refresh = max(1, args.rate // args.display_rate)
+    reads = 2000
+    start = time.perf_counter()
+    for _ in range(reads):
+        history.read(history.count - per_refresh)
+    refresh = (time.perf_counter() - start) / reads
+    start = time.perf_counter()
+    _, entries = history.read()
+    full = time.perf_counter() - start
+    print(f'read:    {refresh * 1e6:.1f} us per refresh ({per_refresh} frames at {args.rate} Hz), '
+          f'{full * 1e3:.2f} ms for the whole buffer ({len(entries):,} frames)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-tick cost of the input shaping in app/schema.py.
+
+Encodes one gamepad payload per tick with the default schema (square deadzone only) and with a schema that uses
+every shaping option (calibration, inversion, radial deadzones, expo curves, smoothing). Compares the compiled
+encoder with the same pipeline evaluated directly in Python every tick (Field.normalize/shape), and reports how
+often the two differ by more than one output count (only inputs within a table step of a deadzone edge should) and
+what building the encoder costs. The default schema compiles to plain deadzone arithmetic with no tables, so only
+the shaped row measures the lookup tables. Run from the repository root:
+
+    python tools/bench_shaping.py [--ticks N]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+import benchlib  # noqa: F401 (puts the repository root on sys.path)
+from app.app import Controller
+from app.gamepads import Gamepad
+from app.schema import DEFAULT_SCHEMA, FrameSchema
+
+SHAPED_SCHEMA = {
+    'fields': [
+        {'name': 'lx', 'source': 'axis', 'index': 0, 'radial': 'ly', 'deadzone': 0.1, 'expo': 0.4, 'smoothing': 0.3},
+        {'name': 'ly', 'source': 'axis', 'index': 1, 'invert': True, 'expo': 0.4, 'smoothing': 0.3},
+        {'name': 'rx', 'source': 'axis', 'index': 2, 'radial': 'ry', 'deadzone': 0.1, 'expo': 0.2,
+         'calibration': [-0.95, 0.02, 0.97]},
+        {'name': 'ry', 'source': 'axis', 'index': 3, 'invert': True, 'calibration': [-0.96, -0.01, 0.98]},
+        {'name': 'l2', 'source': 'axis', 'index': 4, 'signed': False, 'deadzone': 0.05, 'expo': 0.5},
+        {'name': 'r2', 'source': 'axis', 'index': 5, 'signed': False, 'deadzone': 0.05, 'expo': 0.5},
+        {'name': 'buttons', 'source': 'buttons', 'index': 0, 'count': 16},
+    ],
+}
+
+
+def direct_encode(schema, buffer, offset, axes, buttons, hats):
+    """The shaping pipeline evaluated per tick, without tables. Leaves smoothing out, so it is a lower bound."""
+    values = {}
+    for field in schema.fields:
+        if field.source == 'axis':
+            values[field.name] = field.normalize(axes[field.index])
+    for field in schema.fields:
+        if field.radial is not None and field.name < field.radial:
+            x, y = values[field.name], values[field.radial]
+            magnitude = math.sqrt(x * x + y * y)
+            scale = 0.0 if magnitude <= field.deadzone else (1 - field.deadzone / magnitude) / (1 - field.deadzone)
+            values[field.name], values[field.radial] = x * scale, y * scale
+    encoded = []
+    for field in schema.fields:
+        if field.source == 'axis':
+            encoded.append(field.shape(values[field.name]))
+        elif field.source == 'buttons':
+            encoded.append(sum(buttons[field.index + k] << k for k in range(field.count)))
+        else:
+            encoded.append(hats[field.index][field.component])
+    schema.struct.pack_into(buffer, offset, *encoded)
+
+
+def make_inputs(count):
+    # Raw values as SDL reports them: 16-bit steps over -1..1
+    rng = random.Random(1)
+    return [[rng.randint(-32768, 32767) / 32767 for _ in range(6)] for _ in range(count)]
+
+
+def run(gamepad, frame, inputs, ticks, encode=None):
+    count = len(inputs)
+    start = time.perf_counter()
+    for n in range(ticks):
+        gamepad.axes[:] = inputs[n % count]
+        gamepad.buttons[n & 15] = n & 1
+        if encode is None:
+            gamepad.encode(frame)
+        else:
+            encode(gamepad.schema, frame, 1, gamepad.axes, gamepad.buttons, gamepad.hats)
+    return (time.perf_counter() - start) / ticks
+
+
+def compare(schema, inputs):
+    """:return: (largest difference in counts, share of values off by more than one) between the two encoders"""
+    compiled, direct = bytearray(schema.size), bytearray(schema.size)
+    buttons, worst, off = [0] * schema.num_buttons, 0, 0
+    for axes in inputs:
+        schema.encode(compiled, 0, axes, buttons, [])
+        direct_encode(schema, direct, 0, axes, buttons, [])
+        for a, b in zip(schema.decode_values(compiled), schema.decode_values(direct)):
+            worst = max(worst, abs(a - b))
+            off += abs(a - b) > 1
+    return worst, off / (len(inputs) * len(schema.fields))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=200000)
+    args = parser.parse_args()
+
+    inputs = make_inputs(4096)
+    accuracy_inputs = make_inputs(50000)
+    # Loop overhead alone (copying the inputs in), subtracted from every row
+    gamepad = Gamepad(FrameSchema.from_dict(DEFAULT_SCHEMA, Controller.JOY_THRESHOLD))
+    baseline = run(gamepad, bytearray(Controller.FRAME_SIZE), inputs, args.ticks, encode=lambda *_: None)
+
+    for name, config in (('default', DEFAULT_SCHEMA), ('shaped', SHAPED_SCHEMA)):
+        start = time.perf_counter()
+        schema = FrameSchema.from_dict(config, Controller.JOY_THRESHOLD)
+        build = time.perf_counter() - start
+        tables = sum(len(table) for table in schema.encode.__globals__.values() if isinstance(table, list))
+        table_bytes = sum(sys.getsizeof(table) for table in schema.encode.__globals__.values()
+                          if isinstance(table, list))
+        frame = bytearray(1 + schema.size + 1)
+        compiled = run(Gamepad(schema), frame, inputs, args.ticks) - baseline
+        direct = run(Gamepad(schema), frame, inputs, args.ticks, encode=direct_encode) - baseline
+        worst, off = compare(schema, accuracy_inputs)
+        path = f'tables ({tables:,} entries, {table_bytes / 1024:.0f} KiB)' if tables else 'no tables'
+        print(f'{name:<8} compiled {compiled * 1e6:5.2f} us/tick  direct {direct * 1e6:5.2f} us/tick  '
+              f'({direct / compiled:.1f}x)  {compiled * 1000 * 100:.2f}% of a 1 kHz tick')
+        print(f'{"":<8} {off:.3%} of values more than one count off (max {worst}), '
+              f'built in {build * 1e3:.1f} ms, {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Throughput of the shared-memory state in app/sharedstate.py with several concurrent reader processes.
+
+The publisher writes frames whose payload bytes all hold the low byte of the frame's sequence number, so a reader
+that ever returned a frame mixing two publishes (a torn read) is caught. Run from the repository root:
+
+    python tools/bench_sharedstate.py [--readers N] [--rate HZ] [--duration S]
+
+--rate 0 publishes as fast as possible.
+"""
+import argparse
+import multiprocessing
+import time
+
+import benchlib  # noqa: F401 (puts the repository root on sys.path)
+from app.app import Controller
+from app.sharedstate import StatePublisher, StateReader
+
+NAME = 'bench_sharedstate'
+
+
+def make_frame(frame_size, sequence):
+    return bytes((Controller.HEADER,)) + bytes((sequence & 0xFF,)) * (frame_size - 1)
+
+
+def read_loop(duration, results):
+    reader = StateReader(NAME)
+    frames = [make_frame(reader.frame_size, n) for n in range(256)]
+    reads = fresh = torn = 0
+    last_sequence = 0
+    latencies = []
+    end = time.monotonic() + duration
+    while True:
+        sequence, timestamp, frame = reader.read()
+        now = time.monotonic()
+        if now > end:
+            break
+        reads += 1
+        if sequence != last_sequence:
+            fresh += 1
+            last_sequence = sequence
+            if len(latencies) < 100000:
+                latencies.append(now - timestamp)
+        if sequence and frame != frames[sequence & 0xFF]:
+            torn += 1
+    reader.close()
+    latencies.sort()
+    results.put((reads, fresh, torn, reader.retries, latencies[len(latencies) // 2] if latencies else 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--rate', type=int, default=1000, help='publishes per second, 0 for as fast as possible')
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--frame-size', type=int, default=Controller.FRAME_SIZE)
+    args = parser.parse_args()
+
+    publisher = StatePublisher(args.frame_size, NAME)
+    frames = [make_frame(args.frame_size, n) for n in range(256)]
+    results = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=read_loop, args=(args.duration, results))
+               for _ in range(args.readers)]
+    publisher.publish(frames[1])    # The pattern starts at sequence 1
+    for reader in readers:
+        reader.start()
+
+    start = time.perf_counter()
+    end = start + args.duration + 0.5     # Readers take a moment to start
+    period = 1 / args.rate if args.rate else 0
+    next_time = start
+    publish_time = 0.0
+    while time.perf_counter() < end:
+        if period:
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t = time.perf_counter()
+        publisher.publish(frames[(publisher.published + 1) & 0xFF])
+        publish_time += time.perf_counter() - t
+    elapsed = time.perf_counter() - start
+
+    stats = [results.get() for _ in readers]
+    for reader in readers:
+        reader.join()
+    print(f'publisher: {publisher.published / elapsed:,.0f} frames/s, '
+          f'{publish_time / publisher.published * 1e6:.2f} us per publish')
+    for n, (reads, fresh, torn, retries, latency) in enumerate(stats):
+        print(f'reader {n}:  {reads / args.duration:>11,.0f} reads/s, {fresh / args.duration:>9,.0f} new frames/s, '
+              f'median age {latency * 1e6:6.1f} us, {retries} retries, {torn} torn')
+    publisher.close()
+
+
+if __name__ == '__main__':
+    main()
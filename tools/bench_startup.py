@@ -0,0 +1,112 @@
+"""
+Startup benchmark: import cost per module (python -X importtime) and wall-clock time from process launch to the
+first frame arriving on the serial port. Headless runs are then stopped with SIGTERM, which must end the process
+cleanly (exit code 0) within STOP_TIMEOUT. A pty pair stands in for the serial device, so this needs Linux/macOS.
+Run from the repository root:
+
+    python tools/bench_startup.py [--runs N] [--gui] [--top N]
+"""
+import argparse
+import os
+import select
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEADER = 0x9C   # Controller.HEADER, not imported so this process stays cold
+STOP_TIMEOUT = 5.0  # s a headless run may take to shut down after SIGTERM
+
+
+def get_env(gui):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYTHONDONTWRITEBYTECODE='1')
+    if gui:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    return env
+
+
+def import_times(module, gui):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=get_env(gui), capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.append((int(cumulative_us), int(self_us), name.strip()))
+    return times
+
+
+def report_import_times(module, gui, top):
+    times = import_times(module, gui)
+    total = next(cumulative for cumulative, _, name in times if name == module)
+    print(f'import {module}: {total / 1000:.1f} ms cumulative')
+    print(f'  {"cumulative ms":>13}  {"self ms":>8}  module')
+    for cumulative, self_us, name in sorted(times, reverse=True)[:top]:
+        print(f'  {cumulative / 1000:>13.1f}  {self_us / 1000:>8.1f}  {name}')
+
+
+def time_to_first_frame(gui, timeout=30.0):
+    """:return: (s from launch to the first frame, s from SIGTERM to exit or None for the GUI)"""
+    master, slave = os.openpty()
+    args = [sys.executable, '-m', 'app', '--port', os.ttyname(slave), '--status-interval', '3600']
+    if not gui:
+        args.append('--headless')
+
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=ROOT, env=get_env(gui),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            readable, _, _ = select.select([master], [], [], 0.05)
+            if readable and HEADER in os.read(master, 1024):
+                first_frame = time.perf_counter() - start
+                return first_frame, None if gui else stop_with_sigterm(process)
+            if process.poll() is not None:
+                raise RuntimeError(f'app exited with code {process.returncode} before sending a frame')
+        raise TimeoutError('no frame received')
+    finally:
+        process.kill()
+        process.wait()
+        os.close(master)
+        os.close(slave)
+
+
+def stop_with_sigterm(process):
+    """:return: s from SIGTERM until the process exited, raises unless it exited cleanly within STOP_TIMEOUT"""
+    start = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        exit_code = process.wait(STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f'app still running {STOP_TIMEOUT:.0f} s after SIGTERM')
+    if exit_code != 0:
+        raise RuntimeError(f'app exited with code {exit_code} on SIGTERM')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gui', action='store_true', help='measure the GUI entry point instead of --headless')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports to list')
+    args = parser.parse_args()
+
+    report_import_times('app.app', args.gui, args.top)
+    if args.gui:
+        report_import_times('app.gui', args.gui, args.top)
+
+    runs = [time_to_first_frame(args.gui) for _ in range(args.runs)]
+    samples = [first_frame for first_frame, _ in runs]
+    print(f'time to first frame ({"gui" if args.gui else "headless"}, {args.runs} runs): '
+          f'median {statistics.median(samples) * 1000:.0f} ms, min {min(samples) * 1000:.0f} ms, '
+          f'max {max(samples) * 1000:.0f} ms')
+    if not args.gui:
+        stops = [stop for _, stop in runs]
+        print(f'exit on SIGTERM: median {statistics.median(stops) * 1000:.0f} ms, max {max(stops) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Runs the Controller against localhost receivers for each transport in app/transport.py.
+
+A scripted fake joystick feeds the Controller, the TickLoop sends at --rate to a UDP socket or a TCP server on
+127.0.0.1, and a receiver thread decodes what arrives. Halfway through a TCP run the server drops the connection
+to exercise the PortWatcher reconnect. Pass --port to compare against a serial device or pty. With --links N the
+Controller fans out to N UDP receivers plus a link whose writes take 50 ms, which must not slow the others down.
+From the repository root:
+
+    python tools/bench_transport.py [--rate HZ] [--duration S] [--transport udp tcp] [--links N]
+"""
+import argparse
+import select
+import socket
+import threading
+import time
+
+from benchlib import FakeJoystick, attach_joystick
+from app.app import Controller
+from app.decoder import FrameDecoder
+from app.links import Link
+from app.loop import TickLoop
+
+
+class StalledTransport:
+    """A device that takes far longer than a frame time to accept each write."""
+
+    def __init__(self, write_time):
+        self.write_time = write_time
+        self.frames_dropped = 0
+
+    def write(self, data):
+        time.sleep(self.write_time)
+
+    def close(self):
+        pass
+
+
+class Receiver(threading.Thread):
+    """Reads a UDP socket or accepts TCP connections on 127.0.0.1 and decodes every frame received."""
+
+    def __init__(self, kind, schema):
+        super().__init__(name=f'Receiver-{kind}', daemon=True)
+        self.kind = kind
+        self.decoder = FrameDecoder(schema)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM if kind == 'udp' else socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        if kind == 'tcp':
+            self.sock.listen(1)
+        self.port = f'{kind}://127.0.0.1:{self.sock.getsockname()[1]}'
+        self.connection = None
+        self.connections = 0
+        self.running = True
+
+    def drop_connection(self):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            connection.close()
+
+    def run(self):
+        while self.running:
+            sockets = [self.sock] + ([self.connection] if self.connection is not None else [])
+            readable, _, _ = select.select(sockets, [], [], 0.1)
+            for sock in readable:
+                if sock is self.sock and self.kind == 'tcp':
+                    self.drop_connection()
+                    self.connection, _ = self.sock.accept()
+                    self.connections += 1
+                    continue
+                try:
+                    data = sock.recv(65536)
+                except OSError:
+                    continue
+                if not data:    # Peer closed
+                    self.drop_connection()
+                    continue
+                self.decoder.feed(data)
+
+
+def run(kind, args):
+    controller = Controller(Controller.Mode.AUTO_RECONNECT_MEMORY)
+    joystick = attach_joystick(controller, FakeJoystick())
+    controller.set_latency_stats_enabled(True)
+    receiver = None
+    port = args.port
+    if kind != 'serial':
+        receiver = Receiver(kind, controller.schema)
+        receiver.start()
+        port = receiver.port
+    controller.serial_connect(port, args.baudrate)
+    if not controller.is_serial_connected():
+        raise SystemExit(f'could not open {port}')
+    controller.port_watcher.start()
+
+    tick_loop = TickLoop(controller, args.rate)
+    tick_loop.start()
+    start = time.perf_counter()
+    is_dropped = False
+    while time.perf_counter() - start < args.duration:
+        joystick.axes[0] = ((time.perf_counter() - start) * 2) % 2 - 1
+        if kind == 'tcp' and not is_dropped and time.perf_counter() - start > args.duration / 2:
+            receiver.drop_connection()
+            is_dropped = True
+        time.sleep(0.005)
+    tick_loop.stop()
+    controller.port_watcher.stop()
+    time.sleep(0.1)
+    wall = time.perf_counter() - start
+
+    send_stats = controller.get_send_stats()
+    write = controller.get_latency_stats()['write']
+    print(f'{kind:<6}  write p50 {write["p50"]:>4} us, p99 {write["p99"]:>5} us, max {write["max"]:>6} us  '
+          f'sent {send_stats["frames_sent"]}, dropped {send_stats["frames_dropped"]}', end='')
+    if receiver is not None:
+        receiver.running = False
+        print(f', received {receiver.decoder.frames} ({receiver.decoder.frames / wall:.0f}/s), '
+              f'{receiver.decoder.bad_frames} bad'
+              + (f', {receiver.connections} connection(s)' if kind == 'tcp' else ''), end='')
+    print()
+    controller.serial_disconnect()
+
+
+def run_fanout(args):
+    controller = Controller(Controller.Mode.DISABLED_AUTO_CONNECT)
+    attach_joystick(controller, FakeJoystick())
+    receivers = [Receiver('udp', controller.schema) for _ in range(args.links)]
+    for receiver in receivers:
+        receiver.start()
+        controller.add_link(receiver.port, args.baudrate)
+    stalled = Link('stalled (50 ms writes)', args.baudrate)
+    stalled.transport = StalledTransport(0.05)
+    stalled.start()
+    with controller.lock:
+        controller.links = controller.links + [stalled]
+
+    tick_loop = TickLoop(controller, args.rate)
+    controller.get_link_stats()     # Start the rate windows
+    start = time.perf_counter()
+    tick_loop.start()
+    time.sleep(args.duration)
+    loop_stats = tick_loop.get_stats()
+    tick_loop.stop()
+    time.sleep(0.1)
+    wall = time.perf_counter() - start
+
+    print(f'fan-out {args.links} udp + 1 stalled link, {loop_stats["rate"]:.0f}/{args.rate} Hz, '
+          f'jitter max {loop_stats["jitter_max"]:.2f} ms')
+    for receiver, stats in zip(receivers + [None], controller.get_link_stats()):
+        received = f', received {receiver.decoder.frames / wall:.0f}/s' if receiver is not None else ''
+        print(f'  {stats["port"]:<26} {stats["frames_sent"] / wall:>6.0f} frames/s written{received}, '
+              f'replaced {stats["frames_replaced"]}, dropped {stats["frames_dropped"]}')
+    controller.stop_links()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=int, default=500, help='send rate in Hz')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per transport')
+    parser.add_argument('--transport', nargs='+', choices=('udp', 'tcp'), default=['udp', 'tcp'])
+    parser.add_argument('--port', help='also run against this serial device')
+    parser.add_argument('--links', type=int, default=0, help='run the fan-out test with this many UDP links')
+    parser.add_argument('--baudrate', type=int, default=Controller.DEFAULT_BAUDRATE)
+    args = parser.parse_args()
+
+    if args.links:
+        run_fanout(args)
+        return
+    for kind in args.transport + (['serial'] if args.port else []):
+        run(kind, args)
+
+
+if __name__ == '__main__':
+    main()
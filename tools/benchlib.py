@@ -0,0 +1,93 @@
+"""
+Shared pieces for the benchmark scripts: a scriptable fake joystick, a fake serial port, a pty pair that
+stands in for a real serial device and a measure of the memory a call allocates temporarily.
+"""
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+class FakeJoystick:
+    """Duck-types the parts of pygame.joystick.JoystickType the Controller uses."""
+
+    def __init__(self, num_axis=6, num_buttons=16, num_hats=1, instance_id=0):
+        self.axes = [0.0] * num_axis
+        self.buttons = [0] * num_buttons
+        self.hats = [(0, 0)] * num_hats
+        self.instance_id = instance_id
+
+    def init(self):
+        pass
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_numhats(self):
+        return len(self.hats)
+
+    def get_hat(self, i):
+        return self.hats[i]
+
+    def get_axis(self, i):
+        return self.axes[i]
+
+    def get_button(self, i):
+        return self.buttons[i]
+
+
+class FakeSerial:
+    """Stands in for a Controller transport (app/transport.py) and only counts writes."""
+    needs_device = False    # No link budget, frames are never throttled
+
+    def __init__(self):
+        self.writes = 0
+        self.frames_dropped = 0
+
+    def write(self, data):
+        self.writes += 1
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def attach_joystick(controller, joystick):
+    with controller.lock:
+        controller.attach_joystick(joystick)
+    return joystick
+
+
+def open_pty():
+    """
+    :return: (master_fd, slave_path). Open slave_path as the serial port and read what was sent from master_fd.
+    """
+    master, slave = os.openpty()
+    path = os.ttyname(slave)
+    # Raw mode so the line discipline does not translate or echo frame bytes
+    import tty
+    tty.setraw(slave)
+    tty.setraw(master)
+    os.close(slave)
+    return master, path
+
+
+def transient_bytes(func, sample=1000):
+    total = 0
+    tracemalloc.start()
+    for _ in range(sample):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - current
+    tracemalloc.stop()
+    return total / sample
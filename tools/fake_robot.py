@@ -0,0 +1,123 @@
+"""
+A robot stand-in on a pty: decodes the host's frames and answers each read with a telemetry frame (see
+app/telemetry.py) echoing the last sequence number received, a slowly draining battery and a mode taken from the
+low buttons. Connect the app to the printed device path:
+
+    python tools/fake_robot.py [--protocol 1|2] [--delay MS]
+    python -m app --port /dev/pts/N --protocol 2
+
+With --self-test the Controller runs in this process against the fake robot and prints the measured round trips.
+"""
+import argparse
+import os
+import select
+import threading
+import time
+
+from benchlib import FakeJoystick, attach_joystick, open_pty
+from app.app import Controller
+from app.decoder import FrameDecoder, SlipFrameDecoder
+from app.loop import TickLoop
+from app.protocol import PROTOCOL_VERSIONS, SlipProtocol
+from app.telemetry import encode_telemetry
+
+
+class FakeRobot(threading.Thread):
+    FULL_BATTERY = 12600    # mV
+    EMPTY_BATTERY = 10500
+
+    def __init__(self, master, protocol_version, delay):
+        super().__init__(name='FakeRobot', daemon=True)
+        self.master = master
+        if protocol_version == SlipProtocol.VERSION:
+            self.decoder = SlipFrameDecoder()
+        else:
+            self.decoder = FrameDecoder()
+        self.delay = delay
+        self.battery = FakeRobot.FULL_BATTERY
+        self.sequence = 0
+        self.replies = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            readable, _, _ = select.select([self.master], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:     # No process has the device open
+                time.sleep(0.1)
+                continue
+            frames = self.decoder.feed(data)
+            if not frames:
+                continue
+            # Version 1 frames carry no sequence number, a count of frames received is echoed instead
+            sequence = getattr(self.decoder, 'sequence', None)
+            self.sequence = sequence if sequence is not None else (self.sequence + len(frames)) & 0xFF
+            values = self.decoder.decode(frames[-1])
+            mode = values.get('buttons', 0) & 0x3
+            self.battery = max(FakeRobot.EMPTY_BATTERY, self.battery - 1)
+            if self.delay:
+                time.sleep(self.delay)
+            os.write(self.master, encode_telemetry(self.sequence, self.battery, mode))
+            self.replies += 1
+
+
+def self_test(path, args):
+    controller = Controller(Controller.Mode.DISABLED_AUTO_CONNECT)
+    joystick = attach_joystick(controller, FakeJoystick())
+    controller.set_protocol(args.protocol)
+    controller.serial_connect(path, args.baudrate)
+    controller.telemetry.start()
+    tick_loop = TickLoop(controller, args.rate)
+    tick_loop.start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        joystick.buttons[0] = int(time.perf_counter() - start) & 1
+        time.sleep(0.01)
+    tick_loop.stop()
+    time.sleep(0.1)
+    controller.telemetry.stop()
+    controller.serial_disconnect()
+
+    stats = controller.telemetry.get_stats()
+    if stats is None:
+        print('no telemetry received')
+        return
+    print(f'telemetry: {stats["frames"]} frames ({stats["bad_frames"]} bad), battery {stats["battery"]} mV, '
+          f'mode {stats["mode"]}')
+    if stats['rtt_count']:
+        print(f'rtt us:    p50 {stats["rtt_p50"]}, p99 {stats["rtt_p99"]}, max {stats["rtt_max"]} '
+              f'over the last {stats["rtt_count"]} frames')
+    else:
+        print('rtt:       needs --protocol 2, version 1 frames carry no sequence number')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--protocol', type=int, choices=PROTOCOL_VERSIONS, default=SlipProtocol.VERSION)
+    parser.add_argument('--delay', type=float, default=0.0, help='ms the robot takes before answering')
+    parser.add_argument('--self-test', action='store_true', help='drive the fake robot from a Controller here')
+    parser.add_argument('--rate', type=int, default=200, help='send rate of the self test in Hz')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds of the self test')
+    parser.add_argument('--baudrate', type=int, default=Controller.DEFAULT_BAUDRATE)
+    args = parser.parse_args()
+
+    master, path = open_pty()
+    robot = FakeRobot(master, args.protocol, args.delay / 1000)
+    robot.start()
+    if args.self_test:
+        self_test(path, args)
+        return
+    print(f'fake robot on {path} (protocol {args.protocol}), Ctrl-C to stop', flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    print(f'{robot.replies} telemetry frames sent')
+
+
+if __name__ == '__main__':
+    main()